@@ -0,0 +1,148 @@
+###############################################
+###### City Exporter ##########################
+###### author : Efe Ulgen #####################
+###############################################
+##### Streams the city of CityLayout.py straight to OBJ or binary glTF
+##### without Blender. Geometry is written tile by tile, only one tile is
+##### held in memory. Every tile becomes one object / node named like the
+##### tiles of CityGenerator.py ('TILED' mode) and both files are written
+##### Y up, the same as Blender's own exporters.
+#####     python CityExport.py --city-size 1000 --seed 0 --glb city.glb
+###############################################
+
+import argparse
+import json
+import struct
+
+import numpy as np
+
+import CityLayout
+
+_GLB_MAGIC = 0x46546C67
+_GLB_JSON = 0x4E4F534A
+_GLB_BIN = 0x004E4942
+_FLOAT = 5126
+_UNSIGNED_INT = 5125
+_ARRAY_BUFFER = 34962
+_ELEMENT_ARRAY_BUFFER = 34963
+
+
+def _to_y_up(verts):
+    return np.stack([verts[:, 0], verts[:, 2], -verts[:, 1]], axis=1)
+
+
+def export_obj(filepath, tile_size=64, y_up=True, **layout_params):
+    """ Writes the city as OBJ quads, one object per tile """
+    vert_offset = 1
+    with open(filepath, "w") as f:
+        f.write("# Random City Generator\n")
+        for tile, bounds, lods in CityLayout.iter_tile_geometry(tile_size, **layout_params):
+            verts, faces, face_building_ids = lods[0]
+            if y_up:
+                verts = _to_y_up(verts)
+            f.write("o City_Tile_%d_%d\n" % tile)
+            f.write(("v %.6f %.6f %.6f\n" * len(verts)) % tuple(verts.ravel().tolist()))
+            f.write(("f %d %d %d %d\n" * len(faces)) % tuple((faces.ravel() + vert_offset).tolist()))
+            vert_offset += len(verts)
+
+
+##### the glb header is written first, so the per tile sizes and bounds are ###
+##### taken from the layouts before any geometry is built #####################
+def _glb_tile_specs(tile_size, y_up, layout_params):
+    city_size = layout_params.get("city_size", 20)
+    specs = []
+    for tile, row_range, col_range in CityLayout.iter_tiles(city_size, tile_size):
+        layout = CityLayout.generate_layout(row_range=row_range, col_range=col_range, **layout_params)
+        vert_count, face_count = CityLayout.geometry_counts(layout)
+        bounds_min, bounds_max = (np.array(b, dtype=np.float32).tolist() for b in CityLayout.layout_bounds(layout))
+        if y_up:
+            bounds_min, bounds_max = ([bounds_min[0], bounds_min[2], -bounds_max[1]],
+                                      [bounds_max[0], bounds_max[2], -bounds_min[1]])
+        specs.append((tile, int(vert_count.sum()), int(face_count.sum()) * 2, bounds_min, bounds_max))
+    return specs
+
+
+def _glb_json(specs):
+    gltf = {
+        "asset": {"version": "2.0", "generator": "Random City Generator"},
+        "scene": 0,
+        "scenes": [{"nodes": list(range(len(specs)))}],
+        "nodes": [], "meshes": [], "accessors": [], "bufferViews": [], "buffers": [],
+    }
+    offset = 0
+    for tile, vert_count, triangle_count, bounds_min, bounds_max in specs:
+        first_accessor = len(gltf["accessors"])
+        views = ((vert_count * 12, _ARRAY_BUFFER), (vert_count * 4, _ARRAY_BUFFER), (triangle_count * 12, _ELEMENT_ARRAY_BUFFER))
+        for byte_length, target in views:
+            gltf["bufferViews"].append({"buffer": 0, "byteOffset": offset, "byteLength": byte_length, "target": target})
+            offset += byte_length
+        view = len(gltf["bufferViews"]) - 3
+        gltf["accessors"] += [
+            {"bufferView": view, "componentType": _FLOAT, "count": vert_count, "type": "VEC3",
+             "min": bounds_min, "max": bounds_max},
+            {"bufferView": view + 1, "componentType": _FLOAT, "count": vert_count, "type": "SCALAR"},
+            {"bufferView": view + 2, "componentType": _UNSIGNED_INT, "count": triangle_count * 3, "type": "SCALAR"},
+        ]
+        name = "City_Tile_%d_%d" % tile
+        gltf["meshes"].append({"name": name, "primitives": [{
+            "attributes": {"POSITION": first_accessor, "_BUILDING_ID": first_accessor + 1},
+            "indices": first_accessor + 2, "mode": 4}]})
+        gltf["nodes"].append({"name": name, "mesh": len(gltf["meshes"]) - 1})
+    gltf["buffers"].append({"byteLength": offset})
+    return gltf, offset
+
+
+def export_glb(filepath, tile_size=64, y_up=True, **layout_params):
+    """ Writes the city as binary glTF, one node per tile, quads split into two triangles.
+    The building id of every vertex is kept in the _BUILDING_ID attribute. """
+    specs = _glb_tile_specs(tile_size, y_up, layout_params)
+    gltf, bin_length = _glb_json(specs)
+    json_chunk = json.dumps(gltf, separators=(",", ":")).encode("utf-8")
+    json_chunk += b" " * (-len(json_chunk) % 4)
+    with open(filepath, "wb") as f:
+        f.write(struct.pack("<III", _GLB_MAGIC, 2, 12 + 8 + len(json_chunk) + 8 + bin_length))
+        f.write(struct.pack("<II", len(json_chunk), _GLB_JSON))
+        f.write(json_chunk)
+        f.write(struct.pack("<II", bin_length, _GLB_BIN))
+        for tile, bounds, lods in CityLayout.iter_tile_geometry(tile_size, **layout_params):
+            verts, faces, face_building_ids = lods[0]
+            if y_up:
+                verts = _to_y_up(verts)
+            vert_building_ids = np.empty(len(verts), dtype=np.float32)
+            vert_building_ids[faces.ravel()] = np.repeat(face_building_ids, 4)
+            triangles = faces[:, [0, 1, 2, 0, 2, 3]].astype(np.uint32)
+            f.write(verts.astype("<f4").tobytes())
+            f.write(vert_building_ids.astype("<f4").tobytes())
+            f.write(triangles.astype("<u4").tobytes())
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--city-size", type=int, default=20)
+    parser.add_argument("--plane-min-size", type=int, default=3)
+    parser.add_argument("--plane-max-size", type=int, default=4)
+    parser.add_argument("--min-street-size", type=int, default=1)
+    parser.add_argument("--min-building-height", type=int, default=5)
+    parser.add_argument("--max-building-height", type=int, default=15)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--tile-size", type=int, default=64)
+    parser.add_argument("--obj", help="OBJ output path")
+    parser.add_argument("--glb", help="binary glTF output path")
+    args = parser.parse_args()
+    layout_params = {
+        "city_size": args.city_size,
+        "plane_min_size": args.plane_min_size,
+        "plane_max_size": args.plane_max_size,
+        "min_street_size": args.min_street_size,
+        "min_building_height": args.min_building_height,
+        "max_building_height": args.max_building_height,
+        "seed": args.seed,
+    }
+    if args.obj:
+        export_obj(args.obj, args.tile_size, **layout_params)
+    if args.glb:
+        export_glb(args.glb, args.tile_size, **layout_params)
+
+
+if __name__ == "__main__":
+    main()
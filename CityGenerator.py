@@ -2,43 +2,311 @@
 ###### Random City Generator ##################
 ###### author : Efe Ulgen #####################
 ###############################################
+##### The layout and the geometry come from CityLayout.py, this script only
+##### writes them into the scene.
+###############################################
 
 import bpy
-import random
+import os
+import sys
+import numpy as np
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+if script_dir not in sys.path:
+    sys.path.append(script_dir)
+
+import CityLayout
+import CityParallel
+import PhaseProfiler
 
 scene = bpy.context.scene
 
 city_size = 20
-plane_x_pos = 0
-plane_y_pos = 0
 plane_max_size = 4
 plane_min_size = 3
 min_street_size = 1
 
 max_building_height = 15
 min_building_height = 5
-building_height = 0
-building_size = 0
-
-for i in range(city_size):
-    plane_x_pos = 0
-    for t in range(city_size):
-        building_size = random.randint(plane_min_size, plane_max_size)
-        bpy.ops.mesh.primitive_plane_add(size = building_size, location=(plane_x_pos, plane_y_pos, 0))
-        bpy.context.active_object.name = "Building_" + str((i*city_size) + t + 1)
+
+##### the same seed always gives the same city #####
+seed = 0
+
+##### 'BATCHED' writes the whole city into a single mesh in one bulk call,
+##### 'INSTANCED' builds every archetype mesh once and shares it between buildings,
+##### 'TILED' streams the city tile by tile, one collection and one mesh per tile,
+##### 'PARALLEL' builds the tiles of 'TILED' in a process pool,
+##### 'OPERATORS' creates every building as its own object with bpy.ops (slow)
+generation_mode = 'BATCHED'
+
+##### 'INSTANCED' mode only : 'LINKED_DATA' objects share the archetype mesh,
+##### 'COLLECTION' empties instance an archetype collection
+instance_type = 'LINKED_DATA'
+
+##### 'TILED' / 'PARALLEL' : tile_size = 0 derives the tile size from memory_budget_mb,
+##### dirty_tiles = [(row, col), ...] regenerates only these tiles
+tile_size = 0
+memory_budget_mb = 256
+dirty_tiles = []
+
+##### 'PARALLEL' mode only : parallel_workers = 0 uses every core,
+##### parallel_start_method = None uses 'fork' on Linux and 'spawn' elsewhere
+parallel_workers = 0
+parallel_start_method = None
+
+##### 'TILED' / 'PARALLEL' : levels of detail per tile (1 to 3), 0 : full building,
+##### 1 : plain box, 2 : one merged block for the tile. lod_distances are the camera
+##### distances where the next level starts. Tiles out of the camera frustum are hidden.
+lod_levels = 3
+lod_distances = [150, 600]
+lod_auto_update = True
+
+##### profile_phases times every generation phase (see PhaseProfiler.py) and
+##### prints them, profile_output also exports them as 'JSON' or 'CHROME_TRACE'
+profile_phases = False
+profile_output = ""
+profile_format = 'JSON'
+
+##### archetype meshes built so far, keyed by (size, height, roof, antenna) #####
+archetype_cache = {}
+
+
+##### bulk writes flat vertex / quad face buffers into a mesh datablock #######
+def write_mesh(mesh, verts, faces):
+    loop_total = faces.shape[1]
+    mesh.vertices.add(len(verts))
+    mesh.vertices.foreach_set("co", verts.ravel())
+    mesh.loops.add(faces.size)
+    mesh.loops.foreach_set("vertex_index", faces.ravel())
+    mesh.polygons.add(len(faces))
+    mesh.polygons.foreach_set("loop_start", np.arange(0, faces.size, loop_total, dtype=np.int32))
+    if bpy.app.version < (4, 0, 0):
+        mesh.polygons.foreach_set("loop_total", np.full(len(faces), loop_total, dtype=np.int32))
+    mesh.update(calc_edges=True)
+
+
+def add_building_operators(building_id, building_size, building_height, has_roof, has_antenna, x, y):
+    with PhaseProfiler.phase("base"):
+        bpy.ops.mesh.primitive_plane_add(size = building_size, location=(x, y, 0))
+        bpy.context.active_object.name = "Building_" + str(building_id)
+    with PhaseProfiler.phase("edit_mode"):
         bpy.ops.object.editmode_toggle()
-        building_height = random.randint(min_building_height, max_building_height)
+    with PhaseProfiler.phase("walls"):
         bpy.ops.mesh.extrude_region_move(TRANSFORM_OT_translate={"value":(0, 0, building_height)})
-        ##### randomly generate roof tops #####
-        if random.randint(0, 2) == 0:
+    if has_roof:
+        with PhaseProfiler.phase("roof"):
             bpy.ops.mesh.extrude_region_move(TRANSFORM_OT_translate={"value":(0, 0, 1 - (1/building_size))})
             bpy.ops.transform.resize(value=(0.75, 0.75, 0.75))
-            ##### creates antennas #####
-            if random.randint(0, 1) == 0 and building_height >= max_building_height - 1:
+        if has_antenna:
+            with PhaseProfiler.phase("antenna"):
                 bpy.ops.mesh.extrude_region_move(TRANSFORM_OT_translate={"value":(0, 0, 0)})
                 bpy.ops.transform.resize(value=(1/(10 * building_size), 1/(10 * building_size), 1/(10 * building_size)))
-                bpy.ops.mesh.extrude_region_move(TRANSFORM_OT_translate={"value":(0, 0, building_height / 7)}) 
+                bpy.ops.mesh.extrude_region_move(TRANSFORM_OT_translate={"value":(0, 0, building_height / 7)})
+    with PhaseProfiler.phase("edit_mode"):
         bpy.ops.object.editmode_toggle()
-        ####
-        plane_x_pos += (plane_max_size + min_street_size)
-    plane_y_pos += (plane_max_size + min_street_size)
+
+
+##### returns the shared mesh of an archetype, builds it only on a cache miss ###
+def get_archetype_mesh(key, stats):
+    mesh = archetype_cache.get(key)
+    if mesh is None:
+        mesh_name = "Building_Archetype_%d_%d_%d_%d" % key
+        mesh = bpy.data.meshes.get(mesh_name)
+        if mesh is None:
+            with PhaseProfiler.phase("geometry"):
+                verts, faces, _ = CityLayout.build_geometry(CityLayout.archetype_layout(*key))
+            with PhaseProfiler.phase("write"):
+                mesh = bpy.data.meshes.new(mesh_name)
+                write_mesh(mesh, verts, faces)
+            stats["archetypes_built"] += 1
+        archetype_cache[key] = mesh
+    else:
+        stats["cache_hits"] += 1
+    return mesh
+
+
+def get_archetype_collection(key, stats):
+    mesh = get_archetype_mesh(key, stats)
+    collection = bpy.data.collections.get(mesh.name)
+    if collection is None:
+        collection = bpy.data.collections.new(mesh.name)
+        collection.objects.link(bpy.data.objects.new(mesh.name, mesh))
+    return collection
+
+
+def add_city_instanced(layout):
+    stats = {"cache_hits": 0, "archetypes_built": 0}
+    archetypes, building_archetype = CityLayout.find_archetypes(layout)
+    city_collection = bpy.data.collections.new("City")
+    bpy.context.collection.children.link(city_collection)
+    for n in range(len(layout["building_id"])):
+        key = tuple(int(v) for v in archetypes[building_archetype[n]])
+        name = "Building_" + str(int(layout["building_id"][n]))
+        if instance_type == 'COLLECTION':
+            building = bpy.data.objects.new(name, None)
+            building.instance_type = 'COLLECTION'
+            building.instance_collection = get_archetype_collection(key, stats)
+        else:
+            building = bpy.data.objects.new(name, get_archetype_mesh(key, stats))
+        building.location = (layout["x"][n], layout["y"][n], 0)
+        city_collection.objects.link(building)
+    print("City instancing : %d buildings, %d archetypes (%d built), %d cache hits"
+          % (len(layout["building_id"]), len(archetypes), stats["archetypes_built"], stats["cache_hits"]))
+    return stats
+
+
+##### one mesh holding every building of the layout ###########################
+##### "building_id" face attribute keeps N of "Building_N" for every face #####
+def add_batched_mesh(name, verts, faces, face_building_ids, collection):
+    mesh = bpy.data.meshes.new(name)
+    write_mesh(mesh, verts, faces)
+    building_id_attr = mesh.attributes.new("building_id", 'INT', 'FACE')
+    building_id_attr.data.foreach_set("value", face_building_ids.astype(np.int32))
+    obj = bpy.data.objects.new(name, mesh)
+    collection.objects.link(obj)
+    return obj
+
+
+##### every tile lives in its own collection, a dirty tile is cleared and #####
+##### rebuilt without touching the others #####################################
+##### tile bounds are kept in the "city_tile_index" scene property ##########
+##### rebuild : the whole city is regenerated, tiles of an older grid are removed #####
+def clear_tile(tile_collection):
+    old_meshes = [obj.data for obj in tile_collection.objects if obj.type == 'MESH']
+    bpy.data.batch_remove(list(tile_collection.objects))
+    bpy.data.batch_remove([mesh for mesh in old_meshes if mesh.users == 0])
+
+
+def add_city_tiled(tile_geometry, rebuild=False):
+    tiles_root = bpy.data.collections.get("City Tiles")
+    if tiles_root is None:
+        tiles_root = bpy.data.collections.new("City Tiles")
+        bpy.context.collection.children.link(tiles_root)
+    tile_index = scene.get("city_tile_index")
+    tile_bounds = tile_index["tiles"].to_dict() if tile_index is not None and not rebuild else {}
+    for tile, bounds, lods in tile_geometry:
+        name = "City_Tile_%d_%d" % tile
+        tile_collection = bpy.data.collections.get(name)
+        if tile_collection is None:
+            tile_collection = bpy.data.collections.new(name)
+            tiles_root.children.link(tile_collection)
+        else:
+            clear_tile(tile_collection)
+        with PhaseProfiler.phase("write"):
+            for lod, (verts, faces, face_building_ids) in enumerate(lods):
+                lod_name = name if lod == 0 else name + "_LOD" + str(lod)
+                obj = add_batched_mesh(lod_name, verts, faces, face_building_ids, tile_collection)
+                obj["city_lod"] = lod
+                ##### only the full detail level shows until the level of detail pass runs #####
+                obj.hide_viewport = obj.hide_render = lod > 0
+        tile_bounds[name] = list(bounds[0]) + list(bounds[1])
+    if rebuild:
+        stale = [tile_collection for tile_collection in tiles_root.children if tile_collection.name not in tile_bounds]
+        for tile_collection in stale:
+            clear_tile(tile_collection)
+        bpy.data.batch_remove(stale)
+    scene["city_tile_index"] = {"lod_levels": lod_levels, "lod_distances": lod_distances, "tiles": tile_bounds}
+
+
+##### camera distance pass : shows one level of detail per tile and hides #####
+##### the tiles out of the camera frustum #####################################
+def update_city_lod(scene, depsgraph=None):
+    tile_index = scene.get("city_tile_index")
+    camera = scene.camera
+    if tile_index is None:
+        return
+    names = list(tile_index["tiles"].keys())
+    bounds = np.array([tile_index["tiles"][name] for name in names], dtype=np.float64).reshape(-1, 6)
+    if camera is None:
+        ##### no camera to measure from : every tile shows its full detail level #####
+        tile_lods = np.zeros(len(names), dtype=np.int64)
+        visible = np.ones(len(names), dtype=bool)
+    else:
+        render = scene.render
+        projection = camera.calc_matrix_camera(depsgraph or bpy.context.evaluated_depsgraph_get(),
+                                               x=render.resolution_x, y=render.resolution_y,
+                                               scale_x=render.pixel_aspect_x, scale_y=render.pixel_aspect_y)
+        view_projection = np.array(projection @ camera.matrix_world.inverted())
+        tile_lods = CityLayout.select_lods(bounds[:, :3], bounds[:, 3:], camera.matrix_world.translation,
+                                           list(tile_index["lod_distances"]))
+        tile_lods = np.minimum(tile_lods, tile_index["lod_levels"] - 1)
+        visible = CityLayout.tiles_in_frustum(bounds[:, :3], bounds[:, 3:], view_projection)
+    for name, tile_lod, tile_visible in zip(names, tile_lods, visible):
+        tile_collection = bpy.data.collections.get(name)
+        if tile_collection is None:
+            continue
+        for obj in tile_collection.objects:
+            hidden = bool(not tile_visible or obj.get("city_lod", 0) != tile_lod)
+            if obj.hide_viewport != hidden:
+                obj.hide_viewport = hidden
+                obj.hide_render = hidden
+
+
+def city_lod_handler(scene, depsgraph=None):
+    update_city_lod(scene, depsgraph)
+
+
+layout_params = {
+    "city_size": city_size,
+    "plane_min_size": plane_min_size,
+    "plane_max_size": plane_max_size,
+    "min_street_size": min_street_size,
+    "min_building_height": min_building_height,
+    "max_building_height": max_building_height,
+    "seed": seed,
+}
+
+##### profiling is on for profile_phases, the previous state is restored once the city is written #####
+with PhaseProfiler.profiler.profile("CityGenerator " + generation_mode, enable=profile_phases):
+    if generation_mode in ('TILED', 'PARALLEL'):
+        tile_size = tile_size or CityLayout.tile_size_for_budget(memory_budget_mb * 1024 * 1024, city_size)
+        dirty_tiles = set(dirty_tiles) if dirty_tiles else None
+    else:
+        with PhaseProfiler.phase("layout"):
+            layout = CityLayout.generate_layout(**layout_params)
+
+    if generation_mode == 'OPERATORS':
+        with PhaseProfiler.phase("buildings"):
+            for n in range(len(layout["building_id"])):
+                add_building_operators(int(layout["building_id"][n]), int(layout["size"][n]), int(layout["height"][n]),
+                                       bool(layout["roof"][n]), bool(layout["antenna"][n]),
+                                       layout["x"][n], layout["y"][n])
+
+    elif generation_mode == 'INSTANCED':
+        with PhaseProfiler.phase("instancing"):
+            add_city_instanced(layout)
+
+    ##### tiles are generated while they are written, "geometry" times every step of the generator #####
+    elif generation_mode == 'TILED':
+        with PhaseProfiler.phase("tiles"):
+            add_city_tiled(PhaseProfiler.profiler.iterate(
+                "geometry", CityLayout.iter_tile_geometry(tile_size, dirty_tiles, lod_levels, **layout_params)),
+                rebuild=dirty_tiles is None)
+
+    elif generation_mode == 'PARALLEL':
+        with PhaseProfiler.phase("tiles"):
+            add_city_tiled(PhaseProfiler.profiler.iterate(
+                "geometry", CityParallel.generate_tiles_parallel(tile_size, parallel_workers, dirty_tiles, lod_levels,
+                                                                 parallel_start_method, **layout_params)),
+                rebuild=dirty_tiles is None)
+
+    ##### write the whole city in one bulk call ###################################
+    elif generation_mode == 'BATCHED':
+        with PhaseProfiler.phase("geometry"):
+            geometry = CityLayout.build_geometry(layout)
+        with PhaseProfiler.phase("write"):
+            add_batched_mesh("City", *geometry, bpy.context.collection)
+
+    ##### level of detail follows the camera on every frame change ###############
+    if generation_mode in ('TILED', 'PARALLEL'):
+        with PhaseProfiler.phase("lod"):
+            update_city_lod(scene)
+        for handler in [h for h in bpy.app.handlers.frame_change_post if getattr(h, "__name__", "") == "city_lod_handler"]:
+            bpy.app.handlers.frame_change_post.remove(handler)
+        if lod_auto_update:
+            bpy.app.handlers.frame_change_post.append(city_lod_handler)
+
+if profile_phases or PhaseProfiler.profiler.enabled:
+    print(PhaseProfiler.profiler.format_summary())
+    if profile_output:
+        PhaseProfiler.profiler.export(profile_output, profile_format)
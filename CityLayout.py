@@ -0,0 +1,249 @@
+###############################################
+###### City Layout Engine #####################
+###### author : Efe Ulgen #####################
+###############################################
+##### Blender independent layout and geometry for CityGenerator.py.
+##### Every random decision of a building is hashed from (seed, building id),
+##### so any block of the city can be generated on its own and still match
+##### the whole city generated in one pass with the same seed.
+###############################################
+
+import numpy as np
+
+_STREAM_SIZE = 1
+_STREAM_HEIGHT = 2
+_STREAM_ROOF = 3
+_STREAM_ANTENNA = 4
+
+
+def _splitmix64(x):
+    x = x + np.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def _hash_uniform(seed, building_ids, stream):
+    """ Uniform floats in [0, 1) for every building id, one stream per decision """
+    with np.errstate(over='ignore'):
+        key = _splitmix64(np.uint64(seed & 0xFFFFFFFFFFFFFFFF))
+        key = _splitmix64(key ^ np.uint64(stream))
+        bits = _splitmix64(building_ids.astype(np.uint64) + key)
+    return (bits >> np.uint64(11)).astype(np.float64) * (1.0 / (1 << 53))
+
+
+def _hash_randint(seed, building_ids, stream, low, high):
+    """ Same range as random.randint(low, high) """
+    return low + (_hash_uniform(seed, building_ids, stream) * (high - low + 1)).astype(np.int64)
+
+
+def generate_layout(city_size=20, plane_min_size=3, plane_max_size=4, min_street_size=1,
+                    min_building_height=5, max_building_height=15, seed=0,
+                    row_range=None, col_range=None):
+    """ Struct-of-arrays building descriptors of the city grid.
+    row_range / col_range are (start, stop) pairs to generate a block of the city only. """
+    row_start, row_stop = row_range if row_range is not None else (0, city_size)
+    col_start, col_stop = col_range if col_range is not None else (0, city_size)
+    rows, cols = np.meshgrid(np.arange(row_start, row_stop, dtype=np.int64),
+                             np.arange(col_start, col_stop, dtype=np.int64), indexing='ij')
+    rows = rows.ravel()
+    cols = cols.ravel()
+    building_id = rows * city_size + cols + 1
+    block = plane_max_size + min_street_size
+
+    size = _hash_randint(seed, building_id, _STREAM_SIZE, plane_min_size, plane_max_size)
+    height = _hash_randint(seed, building_id, _STREAM_HEIGHT, min_building_height, max_building_height)
+    ##### randomly generate roof tops #####
+    roof = _hash_randint(seed, building_id, _STREAM_ROOF, 0, 2) == 0
+    ##### creates antennas #####
+    antenna = roof & (_hash_randint(seed, building_id, _STREAM_ANTENNA, 0, 1) == 0) & (height >= max_building_height - 1)
+    return {
+        "building_id": building_id,
+        "x": (cols * block).astype(np.float64),
+        "y": (rows * block).astype(np.float64),
+        "size": size,
+        "height": height,
+        "roof": roof,
+        "antenna": antenna,
+    }
+
+
+def building_rings(layout):
+    """ Every building is a stack of square rings, the first ring is the footprint
+    and the last one is capped. Returns (ring count, half sizes, z) with unused rings padded. """
+    size = layout["size"].astype(np.float64)
+    height = layout["height"].astype(np.float64)
+    roof = layout["roof"]
+    antenna = layout["antenna"]
+    ring_count = np.where(antenna, 5, np.where(roof, 3, 2))
+
+    roof_z = height + 1 - (1/size)
+    roof_half = size / 2 * 0.75
+    antenna_half = roof_half / (10 * size)
+    half = np.stack([size / 2, size / 2, roof_half, antenna_half, antenna_half], axis=1)
+    z = np.stack([np.zeros_like(height), height, roof_z, roof_z, roof_z + height / 7], axis=1)
+    return ring_count, half, z
+
+
+##### face templates in the vertex order of primitive_plane_add ###############
+def _face_template(ring_count):
+    faces = [(0, 2, 3, 1)] # bottom
+    for r in range(ring_count - 1):
+        b = r * 4
+        faces.append((b, b + 1, b + 5, b + 4))
+        faces.append((b + 1, b + 3, b + 7, b + 5))
+        faces.append((b + 3, b + 2, b + 6, b + 7))
+        faces.append((b + 2, b, b + 4, b + 6))
+    b = (ring_count - 1) * 4
+    faces.append((b, b + 1, b + 3, b + 2)) # top
+    return np.array(faces, dtype=np.int32)
+
+_FACE_TEMPLATES = {ring_count: _face_template(ring_count) for ring_count in (2, 3, 5)}
+_CORNERS = np.array([(-1, -1), (1, -1), (-1, 1), (1, 1)], dtype=np.float64)
+
+
+def geometry_counts(layout):
+    """ Vertex and face count of every building without building the geometry """
+    ring_count = np.where(layout["antenna"], 5, np.where(layout["roof"], 3, 2))
+    return ring_count * 4, 2 + (ring_count - 1) * 4
+
+
+def build_geometry(layout):
+    """ Flat vertex (V, 3) and quad face (F, 4) buffers of the whole layout, in building order,
+    plus the building id of every face """
+    ring_count, half, z = building_rings(layout)
+    vert_count, face_count = geometry_counts(layout)
+    vert_offset = np.concatenate(([0], np.cumsum(vert_count)[:-1]))
+    face_offset = np.concatenate(([0], np.cumsum(face_count)[:-1]))
+
+    verts = np.empty((int(vert_count.sum()), 3), dtype=np.float32)
+    faces = np.empty((int(face_count.sum()), 4), dtype=np.int32)
+    for rings, template in _FACE_TEMPLATES.items():
+        group = np.flatnonzero(ring_count == rings)
+        if len(group) == 0:
+            continue
+        ##### (buildings, rings, corners, xyz) #####
+        co = np.empty((len(group), rings, 4, 3), dtype=np.float64)
+        co[..., 0] = layout["x"][group, None, None] + half[group, :rings, None] * _CORNERS[:, 0]
+        co[..., 1] = layout["y"][group, None, None] + half[group, :rings, None] * _CORNERS[:, 1]
+        co[..., 2] = z[group, :rings, None]
+        vert_index = vert_offset[group, None] + np.arange(rings * 4)
+        verts[vert_index] = co.reshape(len(group), rings * 4, 3)
+        face_index = face_offset[group, None] + np.arange(len(template))
+        faces[face_index] = template + vert_offset[group, None, None]
+
+    face_building_ids = np.repeat(layout["building_id"], face_count)
+    return verts, faces, face_building_ids
+
+
+def find_archetypes(layout):
+    """ Distinct (size, height, roof, antenna) archetypes of the layout and the archetype index of every building """
+    keys = np.stack([layout["size"], layout["height"], layout["roof"], layout["antenna"]], axis=1).astype(np.int64)
+    archetypes, building_archetype = np.unique(keys, axis=0, return_inverse=True)
+    return archetypes, building_archetype.ravel()
+
+
+def archetype_layout(size, height, roof, antenna):
+    """ One building layout at the origin, used to build the shared mesh of an archetype """
+    return {
+        "building_id": np.array([0], dtype=np.int64),
+        "x": np.zeros(1),
+        "y": np.zeros(1),
+        "size": np.array([size], dtype=np.int64),
+        "height": np.array([height], dtype=np.int64),
+        "roof": np.array([roof], dtype=bool),
+        "antenna": np.array([antenna], dtype=bool),
+    }
+
+
+##### tiled generation ########################################################
+##### rough peak bytes of one building with 5 rings, numpy buffers plus the ###
+##### vertices, edges, loops and faces Blender allocates for it ###############
+BYTES_PER_BUILDING = 4096
+
+
+def tile_size_for_budget(memory_budget_bytes, city_size):
+    """ Largest square tile whose worst-case geometry fits in the memory budget """
+    tile_size = int(np.sqrt(memory_budget_bytes / BYTES_PER_BUILDING))
+    return max(1, min(city_size, tile_size))
+
+
+def iter_tiles(city_size, tile_size):
+    """ ((tile row, tile col), row_range, col_range) of every tile of the city """
+    tile_count = -(-city_size // tile_size)
+    for tile_row in range(tile_count):
+        for tile_col in range(tile_count):
+            row_range = (tile_row * tile_size, min(city_size, (tile_row + 1) * tile_size))
+            col_range = (tile_col * tile_size, min(city_size, (tile_col + 1) * tile_size))
+            yield (tile_row, tile_col), row_range, col_range
+
+
+def iter_tile_geometry(tile_size, tiles=None, lod_levels=1, **layout_params):
+    """ Generates the city one tile at a time, yields (tile, bounds, lods) where lods holds
+    (verts, faces, face_building_ids) for every level of detail, see build_lods.
+    Only the current tile is held in memory. tiles limits the generation to the given (row, col) tiles. """
+    city_size = layout_params.get("city_size", 20)
+    for tile, row_range, col_range in iter_tiles(city_size, tile_size):
+        if tiles is not None and tile not in tiles:
+            continue
+        layout = generate_layout(row_range=row_range, col_range=col_range, **layout_params)
+        yield tile, layout_bounds(layout), build_lods(layout, lod_levels)
+
+
+##### levels of detail ########################################################
+##### 0 : full building, 1 : plain box, 2 : one merged block for the whole tile
+MAX_LOD_LEVELS = 3
+
+
+def layout_bounds(layout):
+    """ (min xyz, max xyz) of all buildings of the layout """
+    ring_count, half, z = building_rings(layout)
+    top = z[np.arange(len(ring_count)), ring_count - 1]
+    half_size = layout["size"] / 2
+    bounds_min = (float((layout["x"] - half_size).min()), float((layout["y"] - half_size).min()), 0.0)
+    bounds_max = (float((layout["x"] + half_size).max()), float((layout["y"] + half_size).max()), float(top.max()))
+    return bounds_min, bounds_max
+
+
+def merged_block_geometry(layout):
+    """ One box over the footprint of the whole layout at the mean building height """
+    (min_x, min_y, _), (max_x, max_y, _) = layout_bounds(layout)
+    height = float(layout["height"].mean())
+    verts = np.array([(x, y, z) for z in (0.0, height) for y in (min_y, max_y) for x in (min_x, max_x)], dtype=np.float32)
+    faces = _FACE_TEMPLATES[2].copy()
+    return verts, faces, np.zeros(len(faces), dtype=np.int64)
+
+
+def build_lods(layout, lod_levels=1):
+    """ [(verts, faces, face_building_ids), ...] for the first lod_levels levels of detail """
+    lods = [build_geometry(layout)]
+    if lod_levels > 1:
+        no_roof = np.zeros_like(layout["roof"])
+        lods.append(build_geometry(dict(layout, roof=no_roof, antenna=no_roof)))
+    if lod_levels > 2:
+        lods.append(merged_block_geometry(layout))
+    return lods
+
+
+def select_lods(bounds_min, bounds_max, camera_position, lod_distances):
+    """ Level of detail of every tile from the distance between the camera and the tile bounds.
+    Tiles closer than lod_distances[0] get level 0, closer than lod_distances[1] level 1, ... """
+    bounds_min = np.asarray(bounds_min, dtype=np.float64)
+    bounds_max = np.asarray(bounds_max, dtype=np.float64)
+    nearest = np.clip(np.asarray(camera_position, dtype=np.float64), bounds_min, bounds_max)
+    distance = np.linalg.norm(nearest - np.asarray(camera_position, dtype=np.float64), axis=1)
+    return np.searchsorted(np.asarray(lod_distances, dtype=np.float64), distance, side='right')
+
+
+def tiles_in_frustum(bounds_min, bounds_max, view_projection):
+    """ False for the tiles whose bounding box lies completely outside one clip plane of the camera """
+    bounds_min = np.asarray(bounds_min, dtype=np.float64)
+    bounds_max = np.asarray(bounds_max, dtype=np.float64)
+    corner_select = np.array([(x, y, z) for x in (0, 1) for y in (0, 1) for z in (0, 1)], dtype=bool)
+    corners = np.where(corner_select[None], bounds_max[:, None], bounds_min[:, None])
+    corners = np.concatenate([corners, np.ones(corners.shape[:2] + (1,))], axis=2)
+    clip = corners @ np.asarray(view_projection, dtype=np.float64).T
+    w = clip[..., 3:]
+    ##### (tiles, corners, planes) -> outside of one plane with every corner #####
+    outside = np.concatenate([clip[..., :3] < -w, clip[..., :3] > w], axis=2)
+    return ~outside.all(axis=1).any(axis=1)
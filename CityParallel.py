@@ -0,0 +1,110 @@
+###############################################
+###### Parallel City Tile Generation ##########
+###### author : Efe Ulgen #####################
+###############################################
+##### Fans the tiles of CityLayout out to a process pool. Workers build the
+##### vertex / face buffers without Blender and hand them back through shared
+##### memory, the caller only does the final bulk mesh writes.
+##### Tiles stay deterministic for any worker count : every building is
+##### hashed from the master seed and its id (see CityLayout.py).
+##### Shared memory blocks are named by the caller, so the blocks of tiles
+##### that were built but never consumed are unlinked when the consumer
+##### stops early.
+##### 'spawn' / 'forkserver' workers import this module as their main module,
+##### not the calling script, which imports bpy and can not run in a worker.
+###############################################
+
+import contextlib
+import multiprocessing
+import os
+import secrets
+import sys
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+import CityLayout
+
+
+def _build_tile(job):
+    tile, row_range, col_range, lod_levels, block_name, layout_params = job
+    layout = CityLayout.generate_layout(row_range=row_range, col_range=col_range, **layout_params)
+    buffers = []
+    for verts, faces, face_building_ids in CityLayout.build_lods(layout, lod_levels):
+        buffers += [verts, faces, face_building_ids.astype(np.int32)]
+    block = shared_memory.SharedMemory(name=block_name, create=True, size=max(1, sum(b.nbytes for b in buffers)))
+    offset = 0
+    specs = []
+    for b in buffers:
+        np.ndarray(b.shape, b.dtype, buffer=block.buf, offset=offset)[...] = b
+        specs.append((b.shape, b.dtype.str, offset))
+        offset += b.nbytes
+    block.close()
+    ##### the caller attaches and unlinks the block, it owns it from now on #####
+    resource_tracker.unregister(block._name, "shared_memory")
+    return tile, CityLayout.layout_bounds(layout), block_name, specs
+
+
+def _unlink_block(block_name):
+    try:
+        block = shared_memory.SharedMemory(name=block_name)
+    except FileNotFoundError:
+        return
+    block.close()
+    block.unlink()
+
+
+def default_start_method():
+    """ 'fork' on Linux, the fastest to start. macOS can not safely fork the
+    threads of Blender and Windows has no fork, both use 'spawn'. """
+    return 'fork' if sys.platform.startswith("linux") else 'spawn'
+
+
+@contextlib.contextmanager
+def _workers_main():
+    """ New 'spawn' / 'forkserver' workers import the parent's main module first.
+    While the pool starts them, the main module is this one instead of the
+    calling script. """
+    main = sys.modules.get("__main__")
+    sys.modules["__main__"] = sys.modules[__name__]
+    try:
+        yield
+    finally:
+        if main is None:
+            del sys.modules["__main__"]
+        else:
+            sys.modules["__main__"] = main
+
+
+def generate_tiles_parallel(tile_size, workers=0, tiles=None, lod_levels=1, start_method=None, **layout_params):
+    """ Same (tile, bounds, lods) items as CityLayout.iter_tile_geometry, in tile order,
+    built by a process pool. workers = 0 uses every core, start_method = None
+    uses default_start_method(). """
+    city_size = layout_params.get("city_size", 20)
+    run_id = "city_%d_%s" % (os.getpid(), secrets.token_hex(4))
+    tile_ranges = [(tile, row_range, col_range)
+                   for tile, row_range, col_range in CityLayout.iter_tiles(city_size, tile_size)
+                   if tiles is None or tile in tiles]
+    jobs = [(tile, row_range, col_range, lod_levels, "%s_%d" % (run_id, n), layout_params)
+            for n, (tile, row_range, col_range) in enumerate(tile_ranges)]
+    unconsumed = {job[4] for job in jobs}
+    context = multiprocessing.get_context(start_method or default_start_method())
+    try:
+        with _workers_main():
+            pool = context.Pool(workers or os.cpu_count())
+        with pool:
+            for tile, bounds, block_name, specs in pool.imap(_build_tile, jobs):
+                unconsumed.discard(block_name)
+                block = shared_memory.SharedMemory(name=block_name)
+                try:
+                    ##### one copy out of shared memory, so the block can be released right away #####
+                    buffers = [np.ndarray(shape, np.dtype(dtype), buffer=block.buf, offset=offset).copy()
+                               for shape, dtype, offset in specs]
+                finally:
+                    block.close()
+                    block.unlink()
+                yield tile, bounds, [tuple(buffers[n:n + 3]) for n in range(0, len(buffers), 3)]
+    finally:
+        ##### the pool is terminated by now, blocks of tiles built ahead of an early stop are freed #####
+        for block_name in unconsumed:
+            _unlink_block(block_name)
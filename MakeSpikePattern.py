@@ -2,9 +2,28 @@
 ##### Make Spike Pattern ##################################################
 ##### author : Efe Ulgen ##################################################
 ###########################################################################
+##### The spikes are built by SpikeEngine.py in one pass over all faces
+##### and written into a new mesh in bulk. Running the script (or the
+##### 'Make Spike Pattern' operator) spikes every selected mesh object.
+##### Objects sharing a mesh are spiked once, results are cached on the
+##### spiked mesh by a hash of the source geometry, its materials, smooth
+##### flags and uvs and the parameters, so running again with unchanged
+##### inputs only reads the source and reassigns cached meshes. Vertex
+##### group fields are read vertex by vertex on every run, to hash them.
+###########################################################################
 
 import bpy
-import bmesh
+import hashlib
+import os
+import sys
+import numpy as np
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+if script_dir not in sys.path:
+    sys.path.append(script_dir)
+
+import PhaseProfiler
+import SpikeEngine
 
 #primitive_type = input("Enter primitive type: ")
 #if primitive_type == "Cube":
@@ -16,36 +35,262 @@ import bmesh
 #elif primitive_type == "Torus":
 #    bpy.ops.mesh.primitive_torus_add()
 
-mesh = bpy.context.active_object
 #subsurf_level = int(input("Enter subsurf level: "))
 subsurf_level = 2
 
-bpy.ops.object.editmode_toggle()
-bpy.ops.mesh.select_all(action='DESELECT')
+##### profile_phases times the read / spike / write / subsurf phases (see
+##### PhaseProfiler.py), profile_output also exports them as 'JSON' or 'CHROME_TRACE'
+profile_phases = False
+profile_output = ""
+profile_format = 'JSON'
+
+##### per face spike parameters ###############################################
+##### every *_field is (source, name) where source is 'CONSTANT', 'NOISE',
+##### 'ATTRIBUTE' (float / int / int8 / bool attribute of any domain) or 'VERTEX_GROUP'.
+##### Field values are used as 0..1 factors of the base value, faces spike
+##### where the mask field is >= spike_mask_threshold.
+spike_params = {
+    "spike_height": 0.1,
+    "spike_height_field": ('CONSTANT', ""),
+    "spike_sharpness": 1.0, # 1 : pointed tip, 0 : flat tip as wide as the face
+    "spike_sharpness_field": ('CONSTANT', ""),
+    "spike_mask_field": ('CONSTANT', ""),
+    "spike_mask_threshold": 0.5,
+    "noise_scale": 1.0,
+    "noise_seed": 0,
+}
+
+FIELD_SOURCES = [
+    ('CONSTANT', "Constant", "Same value for every face"),
+    ('NOISE', "Noise", "Value noise of the face centers"),
+    ('ATTRIBUTE', "Attribute", "Mesh attribute, averaged over the face"),
+    ('VERTEX_GROUP', "Vertex Group", "Vertex group weights, averaged over the face"),
+]
+
+
+##### bulk reads ##############################################################
+def read_mesh(mesh_data):
+    co = np.empty(len(mesh_data.vertices) * 3, dtype=np.float32)
+    mesh_data.vertices.foreach_get("co", co)
+    loop_start = np.empty(len(mesh_data.polygons), dtype=np.int32)
+    mesh_data.polygons.foreach_get("loop_start", loop_start)
+    loop_total = np.empty(len(mesh_data.polygons), dtype=np.int32)
+    mesh_data.polygons.foreach_get("loop_total", loop_total)
+    loop_verts = np.empty(len(mesh_data.loops), dtype=np.int32)
+    mesh_data.loops.foreach_get("vertex_index", loop_verts)
+    return co.reshape(-1, 3), loop_start, loop_total, loop_verts
+
+
+def read_face_values(mesh_data, name, dtype):
+    values = np.empty(len(mesh_data.polygons), dtype=dtype)
+    mesh_data.polygons.foreach_get(name, values)
+    return values
+
+
+def read_uv_layers(mesh_data):
+    uv_layers = {}
+    for uv_layer in mesh_data.uv_layers:
+        uv = np.empty(len(mesh_data.loops) * 2, dtype=np.float32)
+        uv_layer.data.foreach_get("uv", uv)
+        uv_layers[uv_layer.name] = uv.reshape(-1, 2)
+    return uv_layers
+
+
+##### attribute types a field can read, read with these dtypes #####
+ATTRIBUTE_DTYPES = {'FLOAT': np.float32, 'INT': np.int32, 'INT8': np.int8, 'BOOLEAN': bool}
+
+
+##### per face field values, read in bulk and averaged over the face corners #####
+def read_field(obj, mesh_data, field, co, loop_start, loop_verts, params):
+    source, name = field
+    if source == 'NOISE':
+        return SpikeEngine.value_noise(SpikeEngine.face_means(co[loop_verts], loop_start),
+                                       params["noise_scale"], params["noise_seed"])
+    if source == 'ATTRIBUTE':
+        attribute = mesh_data.attributes.get(name)
+        if attribute is None:
+            raise ValueError("%s has no attribute '%s'" % (mesh_data.name, name))
+        if attribute.data_type not in ATTRIBUTE_DTYPES:
+            raise ValueError("Attribute '%s' is %s, spike fields read float, int, int8 and bool attributes"
+                             % (name, attribute.data_type))
+        values = np.empty(len(attribute.data), dtype=ATTRIBUTE_DTYPES[attribute.data_type])
+        attribute.data.foreach_get("value", values)
+        values = values.astype(np.float64)
+        if attribute.domain == 'POINT':
+            return SpikeEngine.face_means(values[loop_verts], loop_start)
+        if attribute.domain == 'CORNER':
+            return SpikeEngine.face_means(values, loop_start)
+        if attribute.domain == 'EDGE':
+            loop_edges = np.empty(len(mesh_data.loops), dtype=np.int32)
+            mesh_data.loops.foreach_get("edge_index", loop_edges)
+            return SpikeEngine.face_means(values[loop_edges], loop_start)
+        return values
+    if source == 'VERTEX_GROUP':
+        ##### vertex group weights have no bulk access, one pass over the vertices #####
+        vertex_group = obj.vertex_groups.get(name)
+        if vertex_group is None:
+            raise ValueError("%s has no vertex group '%s'" % (obj.name, name))
+        group_index = vertex_group.index
+        weights = np.zeros(len(mesh_data.vertices))
+        for vert in mesh_data.vertices:
+            for group in vert.groups:
+                if group.group == group_index:
+                    weights[vert.index] = group.weight
+        return SpikeEngine.face_means(weights[loop_verts], loop_start)
+    return np.ones(len(loop_start))
+
+
+##### bulk writes, face values and uvs follow the source face of every spike #####
+def write_spikes(mesh_data, co, loop_verts, loop_total, polygon_faces, loop_sources, loop_weights,
+                 material_index, use_smooth, uv_layers, loop_start):
+    mesh_data.clear_geometry()
+    mesh_data.vertices.add(len(co))
+    mesh_data.vertices.foreach_set("co", co.astype(np.float32).ravel())
+    mesh_data.loops.add(len(loop_verts))
+    mesh_data.loops.foreach_set("vertex_index", loop_verts.astype(np.int32))
+    mesh_data.polygons.add(len(loop_total))
+    mesh_data.polygons.foreach_set("loop_start", (np.cumsum(loop_total) - loop_total).astype(np.int32))
+    if bpy.app.version < (4, 0, 0):
+        mesh_data.polygons.foreach_set("loop_total", loop_total.astype(np.int32))
+    mesh_data.polygons.foreach_set("material_index", material_index[polygon_faces])
+    mesh_data.polygons.foreach_set("use_smooth", use_smooth[polygon_faces])
+    for name, uv in uv_layers.items():
+        face_uv = SpikeEngine.face_means(uv, loop_start)
+        source_faces = np.searchsorted(loop_start, loop_sources, side='right') - 1
+        spike_uv = face_uv[source_faces] + (uv[loop_sources] - face_uv[source_faces]) * loop_weights[:, None]
+        mesh_data.uv_layers.new(name=name).data.foreach_set("uv", spike_uv.astype(np.float32).ravel())
+    mesh_data.update(calc_edges=True)
+
+
+##### spiked mesh of one source mesh, built once per cache key ##############
+def get_spiked_mesh(obj, source_mesh, params, spiked_meshes, stats):
+    with PhaseProfiler.phase("read"):
+        co, loop_start, loop_total, loop_verts = read_mesh(source_mesh)
+        height = params["spike_height"] * read_field(obj, source_mesh, params["spike_height_field"], co, loop_start, loop_verts, params)
+        sharpness = params["spike_sharpness"] * read_field(obj, source_mesh, params["spike_sharpness_field"], co, loop_start, loop_verts, params)
+        enabled = read_field(obj, source_mesh, params["spike_mask_field"], co, loop_start, loop_verts, params) >= params["spike_mask_threshold"]
+        material_index = read_face_values(source_mesh, "material_index", np.int32)
+        use_smooth = read_face_values(source_mesh, "use_smooth", bool)
+        uv_layers = read_uv_layers(source_mesh)
+
+    ##### float32 like the operator properties, so script and operator runs share keys #####
+    key = hashlib.blake2b(digest_size=16)
+    for buffer in (co, loop_start, loop_total, loop_verts, height.astype(np.float32), sharpness.astype(np.float32), enabled,
+                   material_index, use_smooth):
+        key.update(np.ascontiguousarray(buffer).tobytes())
+    for name, uv in uv_layers.items():
+        key.update(name.encode())
+        key.update(np.ascontiguousarray(uv).tobytes())
+    key.update(repr([material.name if material else None for material in source_mesh.materials]).encode())
+    key = key.hexdigest()
+    spiked_mesh = spiked_meshes.get(key)
+    if spiked_mesh is not None:
+        stats["cache_hits"] += 1
+        return spiked_mesh
+
+    with PhaseProfiler.phase("spike"):
+        spikes = SpikeEngine.make_spikes(co, loop_start, loop_total, loop_verts, height, sharpness, enabled)
+    with PhaseProfiler.phase("write"):
+        spiked_mesh = bpy.data.meshes.new(source_mesh.name + "_spikes")
+        write_spikes(spiked_mesh, *spikes, material_index, use_smooth, uv_layers, loop_start)
+    for material in source_mesh.materials:
+        spiked_mesh.materials.append(material)
+    spiked_mesh["spike_key"] = key
+    spiked_mesh["spike_source"] = source_mesh.name
+    spiked_meshes[key] = spiked_mesh
+    stats["meshes_built"] += 1
+    return spiked_mesh
+
+
+##### objects are grouped by their source mesh, the source mesh is kept ######
+##### with a fake user so the spikes can be rebuilt from it ###################
+def spike_objects(objects, params, subsurf_level):
+    stats = {"objects": 0, "meshes_built": 0, "cache_hits": 0}
+    spiked_meshes = {m["spike_key"]: m for m in bpy.data.meshes if "spike_key" in m}
+    users_by_source = {}
+    for obj in objects:
+        if obj.type != 'MESH':
+            continue
+        source_mesh = obj.data
+        if "spike_source" in source_mesh:
+            source_mesh = bpy.data.meshes.get(source_mesh["spike_source"], source_mesh)
+        users_by_source.setdefault(source_mesh, []).append(obj)
+
+    for source_mesh, users in users_by_source.items():
+        source_mesh.use_fake_user = True
+        spiked_mesh = get_spiked_mesh(users[0], source_mesh, params, spiked_meshes, stats)
+        for obj in users:
+            if obj.data != spiked_mesh:
+                obj.data = spiked_mesh
+            ##### add subsurf ####################
+            if subsurf_level > 0:
+                with PhaseProfiler.phase("subsurf"):
+                    new_mod = obj.modifiers.get("mod") or obj.modifiers.new("mod", 'SUBSURF')
+                    new_mod.levels = subsurf_level
+            stats["objects"] += 1
+    return stats
+
+
+class OBJECT_OT_make_spike_pattern(bpy.types.Operator):
+    """ Spikes every face of the selected meshes """
+    bl_label = "Make Spike Pattern"
+    bl_idname = "object.make_spike_pattern"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    subsurf_level: bpy.props.IntProperty(name="Subsurf Level", default=2, min=0, max=6)
+    spike_height: bpy.props.FloatProperty(name="Height", default=0.1)
+    height_source: bpy.props.EnumProperty(name="Height Source", items=FIELD_SOURCES)
+    height_name: bpy.props.StringProperty(name="Height Attribute / Group")
+    spike_sharpness: bpy.props.FloatProperty(name="Sharpness", default=1.0, min=0.0, max=1.0)
+    sharpness_source: bpy.props.EnumProperty(name="Sharpness Source", items=FIELD_SOURCES)
+    sharpness_name: bpy.props.StringProperty(name="Sharpness Attribute / Group")
+    mask_source: bpy.props.EnumProperty(name="Mask Source", items=FIELD_SOURCES)
+    mask_name: bpy.props.StringProperty(name="Mask Attribute / Group")
+    mask_threshold: bpy.props.FloatProperty(name="Mask Threshold", default=0.5, min=0.0, max=1.0)
+    noise_scale: bpy.props.FloatProperty(name="Noise Scale", default=1.0)
+    noise_seed: bpy.props.IntProperty(name="Noise Seed", default=0)
 
-bm = bmesh.from_edit_mesh(mesh.data)
-bm.faces.ensure_lookup_table()
+    def execute(self, context):
+        if context.mode != 'OBJECT':
+            bpy.ops.object.mode_set(mode='OBJECT')
+        params = {
+            "spike_height": self.spike_height,
+            "spike_height_field": (self.height_source, self.height_name),
+            "spike_sharpness": self.spike_sharpness,
+            "spike_sharpness_field": (self.sharpness_source, self.sharpness_name),
+            "spike_mask_field": (self.mask_source, self.mask_name),
+            "spike_mask_threshold": self.mask_threshold,
+            "noise_scale": self.noise_scale,
+            "noise_seed": self.noise_seed,
+        }
+        try:
+            with PhaseProfiler.profiler.profile(self.bl_label):
+                stats = spike_objects(context.selected_objects, params, self.subsurf_level)
+        except ValueError as error:
+            self.report({'ERROR'}, str(error))
+            return {'CANCELLED'}
+        self.report({'INFO'}, "Spiked %d objects : %d meshes built, %d cache hits"
+                    % (stats["objects"], stats["meshes_built"], stats["cache_hits"]))
+        return {'FINISHED'}
 
-for f in bm.faces:
-    f.select = True
 
-bpy.ops.mesh.extrude_faces_move(TRANSFORM_OT_shrink_fatten={'value':0.1}) # TRANSFORM_OT_translate={'value':(0, 0, 1)},
+def register():
+    bpy.utils.register_class(OBJECT_OT_make_spike_pattern)
 
-selected_faces = []
-for f in bm.faces:
-    if f.select == True:
-        selected_faces.append(f)
-        
-bpy.ops.mesh.select_all(action='DESELECT')
+def unregister():
+    bpy.utils.unregister_class(OBJECT_OT_make_spike_pattern)
 
-for f in selected_faces:
-    f.select = True
-    bpy.ops.mesh.merge(type='CENTER')
-    bpy.ops.mesh.select_all(action='DESELECT')
-    
-bpy.ops.object.editmode_toggle()
 
-##### add subsurf ####################
-if subsurf_level > 0:
-    new_mod = mesh.modifiers.new("mod", 'SUBSURF')
-    new_mod.levels = subsurf_level
+if __name__ == "__main__":
+    register()
+    if bpy.context.mode != 'OBJECT':
+        bpy.ops.object.mode_set(mode='OBJECT')
+    selected = bpy.context.selected_objects or [bpy.context.active_object]
+    with PhaseProfiler.profiler.profile("Make Spike Pattern", enable=profile_phases):
+        stats = spike_objects(selected, spike_params, subsurf_level)
+    print("Spiked %d objects : %d meshes built, %d cache hits"
+          % (stats["objects"], stats["meshes_built"], stats["cache_hits"]))
+    if profile_phases or PhaseProfiler.profiler.enabled:
+        print(PhaseProfiler.profiler.format_summary())
+        if profile_output:
+            PhaseProfiler.profiler.export(profile_output, profile_format)
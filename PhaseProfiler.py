@@ -0,0 +1,177 @@
+###########################################################################
+##### Phase Profiler ######################################################
+##### author : Efe Ulgen ##################################################
+###########################################################################
+##### Opt-in timing of the phases of CityGenerator.py, MakeSpikePattern.py
+##### and the Render Setup Generator. A phase records its wall time, the
+##### bpy.ops calls made inside it and how many objects and meshes it
+##### created. Phases nest, a parent includes its children.
+##### Phases are only recorded inside a profile() while profiling is on,
+##### anywhere else a phase is an empty context manager.
+#####     with PhaseProfiler.profiler.profile("My Script", enable=True):
+#####         with PhaseProfiler.phase("layout"):
+#####             ...
+#####     PhaseProfiler.profiler.export("profile.json", 'CHROME_TRACE')
+##### 'JSON' exports the phases and a per phase summary, 'CHROME_TRACE'
+##### loads in chrome://tracing and Perfetto.
+###########################################################################
+
+import collections
+import contextlib
+import datetime
+import json
+import time
+
+import bpy
+
+EXPORT_FORMATS = [
+    ('JSON', "JSON", "Phases and per phase totals"),
+    ('CHROME_TRACE', "Chrome Trace", "Trace events for chrome://tracing and Perfetto"),
+]
+
+
+class _Phase:
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.operators = collections.Counter()
+
+    def __enter__(self):
+        profiler = self.profiler
+        self.depth = len(profiler._stack)
+        self.objects = len(bpy.data.objects)
+        self.meshes = len(bpy.data.meshes)
+        profiler._stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        end = time.perf_counter()
+        profiler = self.profiler
+        profiler._stack.pop()
+        profiler.records.append({
+            "name": self.name,
+            "depth": self.depth,
+            "start": self.start - profiler.origin,
+            "seconds": end - self.start,
+            "operators": sum(self.operators.values()),
+            "operator_calls": dict(self.operators),
+            "objects_created": len(bpy.data.objects) - self.objects,
+            "meshes_created": len(bpy.data.meshes) - self.meshes,
+        })
+        return False
+
+
+class PhaseProfiler:
+    def __init__(self):
+        self.enabled = False
+        self.recording = False
+        self.label = ""
+        self.started = None
+        self.origin = time.perf_counter()
+        self.records = []
+        self._stack = []
+        self._operator_call = None
+
+    ##### bpy.ops calls are counted by wrapping the operator call while enabled #####
+    def enable(self, enabled=True):
+        if enabled == self.enabled:
+            return
+        operator_type = type(bpy.ops.object.select_all)
+        if enabled:
+            self._operator_call = operator_call = operator_type.__call__
+            stack = self._stack
+
+            def counted_call(operator, *args, **kwargs):
+                name = operator.idname_py()
+                for open_phase in stack:
+                    open_phase.operators[name] += 1
+                return operator_call(operator, *args, **kwargs)
+
+            operator_type.__call__ = counted_call
+        else:
+            operator_type.__call__ = self._operator_call
+            self.recording = False
+        self.enabled = enabled
+
+    @contextlib.contextmanager
+    def profile(self, label, enable=False):
+        """ Records the phases run inside it as a new profile, the records of the
+        previous one are dropped. enable turns profiling on for the profile only """
+        was_enabled = self.enabled
+        if enable:
+            self.enable()
+        if self.enabled:
+            self.label = label
+            self.started = datetime.datetime.now().isoformat(timespec='seconds')
+            self.origin = time.perf_counter()
+            self.records = []
+            self._stack.clear()
+            self.recording = True
+        try:
+            yield self
+        finally:
+            self.recording = False
+            self.enable(was_enabled)
+
+    def phase(self, name):
+        if not self.recording:
+            return contextlib.nullcontext()
+        return _Phase(self, name)
+
+    def iterate(self, name, iterable):
+        """ Yields the items of iterable, every step timed as a phase """
+        iterator = iter(iterable)
+        while True:
+            with self.phase(name):
+                item = next(iterator, _END)
+            if item is _END:
+                return
+            yield item
+
+    ##### results ##########################################################
+    def summary(self):
+        """ Totals per phase name, in the order phases first started """
+        totals = {}
+        for record in sorted(self.records, key=lambda record: record["start"]):
+            total = totals.setdefault(record["name"], {"name": record["name"], "depth": record["depth"], "calls": 0,
+                                                       "seconds": 0.0, "operators": 0, "objects_created": 0,
+                                                       "meshes_created": 0})
+            total["calls"] += 1
+            for key in ("seconds", "operators", "objects_created", "meshes_created"):
+                total[key] += record[key]
+        return list(totals.values())
+
+    def format_summary(self):
+        lines = ["%s : phase profile" % self.label,
+                 "%-28s %6s %10s %8s %8s %8s" % ("phase", "calls", "ms", "ops", "objects", "meshes")]
+        for total in self.summary():
+            lines.append("%-28s %6d %10.2f %8d %8d %8d" % ("  " * total["depth"] + total["name"], total["calls"],
+                                                           total["seconds"] * 1000, total["operators"],
+                                                           total["objects_created"], total["meshes_created"]))
+        return "\n".join(lines)
+
+    def to_json(self):
+        return {"label": self.label, "started": self.started, "blender_version": list(bpy.app.version),
+                "phases": sorted(self.records, key=lambda record: record["start"]), "summary": self.summary()}
+
+    def to_chrome_trace(self):
+        events = [{"name": record["name"], "cat": self.label, "ph": "X", "pid": 1, "tid": 1,
+                   "ts": record["start"] * 1e6, "dur": record["seconds"] * 1e6,
+                   "args": {key: record[key] for key in ("operators", "operator_calls",
+                                                         "objects_created", "meshes_created")}}
+                  for record in self.records]
+        return {"traceEvents": events, "displayTimeUnit": "ms",
+                "otherData": {"label": self.label, "started": self.started}}
+
+    def export(self, filepath, export_format='JSON'):
+        report = self.to_chrome_trace() if export_format == 'CHROME_TRACE' else self.to_json()
+        with open(filepath, 'w') as output:
+            json.dump(report, output, indent=1)
+
+
+_END = object()
+
+##### one profiler for every script of the Blender session #####
+profiler = PhaseProfiler()
+phase = profiler.phase
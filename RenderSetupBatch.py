@@ -0,0 +1,217 @@
+###############################################################################
+##### Render Setup Batch ######################################################
+##### author : Efe Ulgen ######################################################
+###############################################################################
+##### Renders a list of assets with one light rig from RenderSetupGenerator.py.
+##### The rig is built once (or taken from the opened file) and moved to the
+##### bounds of every asset, then the asset is rendered and removed again.
+##### Assets are files (.blend, .obj, .fbx, .glb, .gltf, .stl, .ply, .usd*),
+##### folders of such files or .txt files with one path per line :
+#####     blender --background --python RenderSetupBatch.py -- assets.txt --output renders
+##### Open a template .blend before --python to keep its render settings,
+##### otherwise the assets are rendered in an empty scene.
+##### Lights and cameras that come with an asset are left out of the render,
+##### the asset is lit by the rig only.
+##### Every render is written as soon as it is done, and a line per asset is
+##### appended to render_log.jsonl in the output folder. While an asset
+##### loads and renders, the next file is read ahead in a thread so its
+##### import starts from the disk cache.
+###############################################################################
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import bpy
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import RenderSetupGenerator
+
+
+IMPORTERS = {
+    ".obj": lambda path: bpy.ops.wm.obj_import(filepath=path),
+    ".fbx": lambda path: bpy.ops.import_scene.fbx(filepath=path),
+    ".glb": lambda path: bpy.ops.import_scene.gltf(filepath=path),
+    ".gltf": lambda path: bpy.ops.import_scene.gltf(filepath=path),
+    ".stl": lambda path: bpy.ops.wm.stl_import(filepath=path),
+    ".ply": lambda path: bpy.ops.wm.ply_import(filepath=path),
+    ".usd": lambda path: bpy.ops.wm.usd_import(filepath=path),
+    ".usda": lambda path: bpy.ops.wm.usd_import(filepath=path),
+    ".usdc": lambda path: bpy.ops.wm.usd_import(filepath=path),
+    ".usdz": lambda path: bpy.ops.wm.usd_import(filepath=path),
+}
+ASSET_EXTENSIONS = set(IMPORTERS) | {".blend"}
+
+
+def collect_assets(paths):
+    assets = []
+    for path in paths:
+        if os.path.isdir(path):
+            assets += [os.path.join(path, name) for name in sorted(os.listdir(path))
+                       if os.path.splitext(name)[1].lower() in ASSET_EXTENSIONS]
+        elif path.lower().endswith(".txt"):
+            with open(path) as asset_list:
+                assets += [line.strip() for line in asset_list if line.strip() and not line.startswith("#")]
+        else:
+            assets.append(path)
+    return assets
+
+
+def prefetch(path, chunk_size=1 << 20):
+    """ Reads the file once so the import that follows hits the disk cache """
+    with open(path, 'rb') as asset_file:
+        while asset_file.read(chunk_size):
+            pass
+
+
+##### lights and cameras of an asset would change the rig lighting ###########
+RIG_ONLY_TYPES = {'LIGHT', 'LIGHT_PROBE', 'CAMERA'}
+
+
+def import_asset(path, collection):
+    """ Imports the file into collection, returns the new objects """
+    extension = os.path.splitext(path)[1].lower()
+    before = set(bpy.data.objects)
+    if extension == ".blend":
+        with bpy.data.libraries.load(path, link=False) as (data_from, data_to):
+            data_to.objects = data_from.objects
+        for obj in data_to.objects:
+            if obj is not None and obj.type not in RIG_ONLY_TYPES:
+                collection.objects.link(obj)
+    elif extension in IMPORTERS:
+        IMPORTERS[extension](path)
+    else:
+        raise ValueError("Unsupported asset type : %s" % extension)
+    objects = [obj for obj in bpy.data.objects if obj not in before]
+    for obj in objects:
+        if obj.type in RIG_ONLY_TYPES:
+            obj.hide_render = True
+    return objects
+
+
+def remove_asset(objects):
+    bpy.data.batch_remove(objects)
+    bpy.data.orphans_purge(do_local_ids=True, do_linked_ids=True, do_recursive=True)
+
+
+##### the rig of the opened file, or a new one ################################
+def get_batch_rig(scene):
+    if not RenderSetupGenerator.has_rig(scene):
+        rig = RenderSetupGenerator.create_rig(scene.collection)
+        RenderSetupGenerator.store_rig(scene, rig)
+        RenderSetupGenerator.lock_transforms(rig.values())
+    rig = {role: RenderSetupGenerator.get_rig_object(scene, role) for role in RenderSetupGenerator.RIG_NAMES}
+    missing = [role for role, obj in rig.items() if obj is None]
+    if missing:
+        raise RuntimeError("The light rig in the file is missing : %s" % ", ".join(missing))
+    scene.camera = rig["camera"]
+    return rig
+
+
+##### moves the rig to the bounds of the asset, returns the edge ##############
+def retarget_rig(rig, objects, fast_bounds=False):
+    subjects = [obj for obj in objects if obj.type == 'MESH'] or objects
+    bpy.context.view_layer.update()
+    bounds_min, bounds_max = RenderSetupGenerator.get_world_bounds(subjects, exact=not fast_bounds)
+    length, width, height = bounds_max - bounds_min
+    edge = max([width, length, height])
+    if edge <= 0:
+        return edge
+    RenderSetupGenerator.layout_rig(rig, (bounds_min + bounds_max) / 2, edge, height)
+    rig["camera"].data.clip_start = edge / 100
+    rig["camera"].data.clip_end = edge * 10
+    return edge
+
+
+def main():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(description="Render assets with the Render Setup Generator light rig")
+    parser.add_argument("assets", nargs="+", help="asset files, folders or .txt lists of asset files")
+    parser.add_argument("--output", required=True, help="folder for the renders and render_log.jsonl")
+    parser.add_argument("--engine", help="render engine, the scene's engine by default")
+    parser.add_argument("--samples", type=int, help="Cycles / EEVEE samples")
+    parser.add_argument("--resolution", type=int, nargs=2, metavar=("X", "Y"))
+    parser.add_argument("--format", default="PNG", help="image file format")
+    parser.add_argument("--fast-bounds", action="store_true", help="frame the bounding box corners only")
+    parser.add_argument("--resume", action="store_true", help="skip assets that already have a render")
+    args = parser.parse_args(argv)
+
+    assets = collect_assets(args.assets)
+    os.makedirs(args.output, exist_ok=True)
+
+    if not bpy.data.filepath:
+        bpy.ops.wm.read_factory_settings(use_empty=True) # no template, drop the startup cube, camera and light
+    RenderSetupGenerator.register()
+    scene = bpy.context.scene
+    if args.engine:
+        scene.render.engine = args.engine
+    if args.samples:
+        if scene.render.engine == 'CYCLES':
+            scene.cycles.samples = args.samples
+        else:
+            scene.eevee.taa_render_samples = args.samples
+    if args.resolution:
+        scene.render.resolution_x, scene.render.resolution_y = args.resolution
+        scene.render.resolution_percentage = 100
+    scene.render.image_settings.file_format = args.format
+    rig = get_batch_rig(scene)
+
+    rendered = 0
+    batch_start = time.perf_counter()
+    executor = ThreadPoolExecutor(max_workers=1)
+    pending = executor.submit(prefetch, assets[0]) if assets else None
+    with open(os.path.join(args.output, "render_log.jsonl"), 'a') as log:
+        for n, path in enumerate(assets):
+            name = "%05d_%s" % (n, os.path.splitext(os.path.basename(path))[0])
+            image = os.path.join(args.output, name + scene.render.file_extension)
+            entry = {"asset": path, "image": image}
+            try:
+                pending.result()
+            except OSError:
+                pass # reported by the import below
+            if n + 1 < len(assets):
+                pending = executor.submit(prefetch, assets[n + 1])
+            if args.resume and os.path.exists(image):
+                entry["status"] = "skipped"
+                log.write(json.dumps(entry) + "\n")
+                continue
+
+            ##### everything the import created is removed, also when the importer failed halfway #####
+            before = set(bpy.data.objects)
+            start = time.perf_counter()
+            try:
+                objects = import_asset(path, scene.collection)
+                entry["load_s"] = time.perf_counter() - start
+                entry["objects"] = len(objects)
+                entry["edge"] = retarget_rig(rig, objects, args.fast_bounds)
+                if entry["edge"] <= 0:
+                    raise ValueError("Asset has no geometry")
+                start = time.perf_counter()
+                scene.render.filepath = image
+                bpy.ops.render.render(write_still=True)
+                entry["render_s"] = time.perf_counter() - start
+                entry["status"] = "ok"
+                rendered += 1
+            except Exception as error:
+                entry["status"] = "error"
+                entry["error"] = str(error)
+            finally:
+                remove_asset([obj for obj in bpy.data.objects if obj not in before])
+
+            log.write(json.dumps(entry) + "\n")
+            log.flush()
+            elapsed = time.perf_counter() - batch_start
+            print("[%d/%d] %s %s, %.1f assets per minute" % (n + 1, len(assets), path, entry["status"],
+                                                             rendered / elapsed * 60))
+    executor.shutdown()
+
+    elapsed = time.perf_counter() - batch_start
+    print("Rendered %d of %d assets in %.1f s, %.1f assets per minute" % (rendered, len(assets), elapsed,
+                                                                          rendered / elapsed * 60 if elapsed else 0))
+
+
+if __name__ == "__main__":
+    main()
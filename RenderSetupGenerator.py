@@ -10,7 +10,20 @@
 ##### 'R' and 'S' hotkeys. Keep in mind to make light distance values uniform 
 ##### for all axes.
 ###############################################################################
-##### !! Do not change the name of elements of Light Rig !!
+##### The rig elements are kept in the scene's render_rig property, so they
+##### can be renamed freely.
+###############################################################################
+##### The rig is sized from one cached subject extent, shown in the panel.
+##### With 'Live Update' on, the rig follows the subjects when they are
+##### edited, measured and centered the way they were generated : position,
+##### distances, sizes, light energies and the background are updated, the
+##### rotations made in the panel are kept. Reset puts the rotations back and
+##### resizes the rig from the cached extent.
+###############################################################################
+##### 'Profile Phases' in the panel times the phases of 'Generate Render
+##### Setup' with PhaseProfiler.py, when it is next to this file. The last
+##### profile is shown in the panel and can be exported as JSON or as a
+##### Chrome trace.
 ###############################################################################
 
 bl_info = {
@@ -22,197 +35,469 @@ bl_info = {
     "description" : "Creates a 3-key studio lighting around selected object."
     }
 
+import contextlib
 import math
 import mathutils
+import os
+import sys
+import numpy as np
 import bpy
-import bmesh
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+if script_dir not in sys.path:
+    sys.path.append(script_dir)
+
+try:
+    import PhaseProfiler
+except ImportError: # installed on its own, profiling is not available
+    PhaseProfiler = None
+
+
+##### phases are recorded inside the profile of 'Generate Render Setup' only, #####
+##### the reset, extent edits and live updates run them unrecorded ###########
+def profile(label):
+    if PhaseProfiler is None:
+        return contextlib.nullcontext()
+    return PhaseProfiler.profiler.profile(label)
+
+
+def phase(name):
+    if PhaseProfiler is None:
+        return contextlib.nullcontext()
+    return PhaseProfiler.phase(name)
+
+
+##### world space bounds ######################################################
+##### exact : every vertex in one foreach_get and one matrix transform,
+##### otherwise only the 8 bound_box corners. use_evaluated reads the mesh
+##### with modifiers applied. Empties, cameras, lights and other objects
+##### without geometry are skipped.
+GEOMETRY_TYPES = {'MESH', 'CURVE', 'SURFACE', 'META', 'FONT', 'CURVES', 'POINTCLOUD', 'VOLUME', 'GREASEPENCIL'}
+
+
+def get_world_bounds(objects, depsgraph=None, use_evaluated=False, exact=True):
+    bounds_min = []
+    bounds_max = []
+    for obj in objects:
+        if obj.type not in GEOMETRY_TYPES:
+            continue
+        if use_evaluated:
+            obj = obj.evaluated_get(depsgraph)
+        if exact and use_evaluated:
+            mesh_data = obj.to_mesh()
+            if mesh_data is None:
+                continue
+            co = np.empty(len(mesh_data.vertices) * 3, dtype=np.float32)
+            mesh_data.vertices.foreach_get("co", co)
+            obj.to_mesh_clear()
+        elif exact and obj.type == 'MESH':
+            co = np.empty(len(obj.data.vertices) * 3, dtype=np.float32)
+            obj.data.vertices.foreach_get("co", co)
+        else:
+            co = np.array(obj.bound_box, dtype=np.float64)
+        co = co.reshape(-1, 3).astype(np.float64)
+        if len(co) == 0:
+            continue
+        matrix = np.array(obj.matrix_world)
+        co_world = co @ matrix[:3, :3].T + matrix[:3, 3]
+        bounds_min.append(co_world.min(axis=0))
+        bounds_max.append(co_world.max(axis=0))
+    if not bounds_min:
+        return mathutils.Vector((0, 0, 0)), mathutils.Vector((0, 0, 0))
+    return mathutils.Vector(np.min(bounds_min, axis=0)), mathutils.Vector(np.max(bounds_max, axis=0))
+
+
+##### rig construction ########################################################
+##### The rig is built on bpy.data without operators, so it does not depend
+##### on the active object or selection and runs from background scripts.
+##### Every rig element has a role, the object names are the names the rig
+##### always had.
+RIG_NAMES = {
+    "root": "Light Rig Root",
+    "camera": "main_cam",
+    "camera_local": "Camera Local Controller",
+    "camera_global": "Camera Global Controller",
+    "background": "Background",
+    "key_light": "Key Light",
+    "key_local": "Key Light Local Controller",
+    "key_global": "Key Light Global Controller",
+    "fill_light": "Fill Light",
+    "fill_local": "Fill Light Local Controller",
+    "fill_global": "Fill Light Global Controller",
+    "back_light": "Back Light",
+    "back_local": "Back Light Local Controller",
+    "back_global": "Back Light Global Controller",
+}
+
+##### (light, local controller, global controller) of the three light rigs #####
+LIGHT_RIGS = (
+    ("key_light", "key_local", "key_global"),
+    ("fill_light", "fill_local", "fill_global"),
+    ("back_light", "back_local", "back_global"),
+)
+
+##### same circle as primitive_bezier_circle_add #####
+_CIRCLE_POINTS = ((-1, 0), (0, 1), (1, 0), (0, -1))
+
+
+def new_bezier_circle(name):
+    curve = bpy.data.curves.new(name, 'CURVE')
+    curve.dimensions = '3D'
+    spline = curve.splines.new('BEZIER')
+    spline.bezier_points.add(len(_CIRCLE_POINTS) - 1)
+    spline.use_cyclic_u = True
+    for point in spline.bezier_points:
+        point.handle_left_type = 'AUTO'
+        point.handle_right_type = 'AUTO'
+    set_circle_radius(curve, 1)
+    return bpy.data.objects.new(name, curve)
+
+
+def set_circle_radius(curve, radius):
+    for point, (x, y) in zip(curve.splines[0].bezier_points, _CIRCLE_POINTS):
+        point.co = (x * radius, y * radius, 0)
+    curve.splines[0].calc_length() # refreshes the auto handles
+
+
+##### plane with its -x edge extruded up, in world space ######################
+def build_background_mesh(mesh_data, center, edge, height):
+    x, y, z = center.x, center.y, center.z - (height / 2 + height / 10)
+    verts = [(x - edge, y - edge * 1.5, z), (x + edge, y - edge * 1.5, z),
+             (x - edge, y + edge * 1.5, z), (x + edge, y + edge * 1.5, z),
+             (x - edge, y - edge * 1.5, z + edge * 2), (x - edge, y + edge * 1.5, z + edge * 2)]
+    mesh_data.clear_geometry()
+    mesh_data.from_pydata(verts, [], [(0, 1, 3, 2), (0, 2, 5, 4)])
+    uv_layer = mesh_data.uv_layers.new(name="UVMap")
+    uv_layer.data.foreach_set("uv", (0, 0, 1, 0, 1, 1, 0, 1, 0, 0, 0, 1, 0, 1, 0, 0))
+    mesh_data.polygons.foreach_set("use_smooth", (True, True))
+    mesh_data.update()
+
+
+def create_rig(collection):
+    rig = {}
+    rig["root"] = bpy.data.objects.new(RIG_NAMES["root"], None)
+    rig["camera"] = bpy.data.objects.new(RIG_NAMES["camera"], bpy.data.cameras.new(RIG_NAMES["camera"]))
+    rig["background"] = bpy.data.objects.new(RIG_NAMES["background"], bpy.data.meshes.new(RIG_NAMES["background"]))
+    new_bevel_mod = rig["background"].modifiers.new("bevel_mod", 'BEVEL')
+    new_bevel_mod.offset_type = 'PERCENT'
+    new_bevel_mod.width_pct = 20
+    new_bevel_mod.segments = 10
+    for light, local_ctrl, global_ctrl in LIGHT_RIGS:
+        rig[light] = bpy.data.objects.new(RIG_NAMES[light], bpy.data.lights.new(RIG_NAMES[light], 'AREA'))
+        rig[light].data.size = 1.0 # lights.new makes area lights 0.25 wide, light_add made them 1.0
+    for role in ("camera_local", "camera_global", "key_local", "key_global",
+                 "fill_local", "fill_global", "back_local", "back_global"):
+        rig[role] = new_bezier_circle(RIG_NAMES[role])
+
+    rig["camera"].parent = rig["camera_local"]
+    rig["camera_local"].parent = rig["camera_global"]
+    for light, local_ctrl, global_ctrl in LIGHT_RIGS:
+        rig[light].parent = rig[local_ctrl]
+        rig[local_ctrl].parent = rig[global_ctrl]
+    for role in ("camera_global", "background", "key_global", "fill_global", "back_global"):
+        rig[role].parent = rig["root"]
+
+    for obj in rig.values():
+        collection.objects.link(obj)
+    return rig
+
+
+##### rig descriptor ##########################################################
+##### One object pointer per rig role, stored on the scene, so the panel and
+##### the operators read the rig directly instead of looking objects up by
+##### name in the scene.
+def on_extent_update(descriptor, context):
+    apply_rig_extent(descriptor.id_data)
+
+
+class RenderRigSubject(bpy.types.PropertyGroup):
+    object: bpy.props.PointerProperty(type=bpy.types.Object, name="Object")
+
+
+class RenderRigDescriptor(bpy.types.PropertyGroup):
+    __annotations__ = {role: bpy.props.PointerProperty(type=bpy.types.Object, name=name)
+                       for role, name in RIG_NAMES.items()}
+    __annotations__.update({
+        ##### the objects the rig was generated for and how they were measured #####
+        "subjects": bpy.props.CollectionProperty(type=RenderRigSubject, name="Subjects"),
+        "use_evaluated": bpy.props.BoolProperty(name="Use Modifiers", default=False),
+        "fast_bounds": bpy.props.BoolProperty(name="Fast Bounds", default=False),
+        "use_selection": bpy.props.BoolProperty(name="All Selected Objects", default=False,
+                                                description="Centered on the combined bounds of the subjects"),
+        "edge": bpy.props.FloatProperty(name="Subject Extent", min=0, subtype='DISTANCE',
+                                        update=on_extent_update,
+                                        description="Largest side of the subject, the rig is sized from it"),
+        "height": bpy.props.FloatProperty(name="Subject Height", min=0, subtype='DISTANCE', update=on_extent_update,
+                                          description="Height of the subject, places the background floor"),
+        "live": bpy.props.BoolProperty(name="Live Update", default=False,
+                                       description="Resize the rig when the subject changes"),
+    })
+
+
+def store_rig(scene, rig):
+    for role, obj in rig.items():
+        setattr(scene.render_rig, role, obj)
+
+
+def store_subjects(scene, subjects, use_evaluated=False, fast_bounds=False, use_selection=False):
+    scene.render_rig.subjects.clear()
+    for subject in subjects:
+        scene.render_rig.subjects.add().object = subject
+    scene.render_rig.use_evaluated = use_evaluated
+    scene.render_rig.fast_bounds = fast_bounds
+    scene.render_rig.use_selection = use_selection
+
+
+def get_subjects(scene):
+    """ Subjects of the rig that are still in the scene """
+    return [item.object for item in scene.render_rig.subjects
+            if item.object is not None and item.object.users_collection]
+
+
+def store_extent(scene, edge, height):
+    """ Caches the subject extent without running the update callbacks """
+    scene.render_rig["edge"] = edge
+    scene.render_rig["height"] = height
+
+
+def get_rig(scene):
+    """ Role to object dict of the scene's rig, None if any element is missing """
+    if not has_rig(scene):
+        return None
+    rig = {role: get_rig_object(scene, role) for role in RIG_NAMES}
+    if None in rig.values():
+        return None
+    return rig
+
+
+def forget_rig(scene):
+    for role in RIG_NAMES:
+        setattr(scene.render_rig, role, None)
+    scene.render_rig.subjects.clear()
+
+
+def get_rig_object(scene, role):
+    """ Rig object of the role, None if it was never set or removed from the file """
+    return getattr(scene.render_rig, role)
+
+
+##### deleting the rig with 'X' unlinks the objects but the descriptor keeps them #####
+##### alive, so the root is checked for a collection. users_collection scans every #####
+##### collection, it is only done for the root, once per call #####
+def has_rig(scene):
+    root = scene.render_rig.root
+    return root is not None and bool(root.users_collection)
+
+
+##### removes the rig objects and the object data only they used, ###########
+##### in one batch_remove each, without touching the rest of the scene #######
+def remove_rig(scene):
+    objects = [getattr(scene.render_rig, role) for role in RIG_NAMES]
+    objects = [obj for obj in objects if obj is not None]
+    data = {obj.data for obj in objects if obj.data is not None}
+    forget_rig(scene)
+    bpy.data.batch_remove(objects)
+    bpy.data.batch_remove([block for block in data if block.users == 0])
+
+
+def lock_transforms(objects):
+    for obj in objects:
+        obj.lock_location = (True, True, True)
+        obj.lock_rotation = (True, True, True)
+        obj.lock_scale = (True, True, True)
+
+
+##### rig proportions, all in subject edges ##################################
+##### the camera sits CAMERA_DISTANCE edges away, tilted to look at the top
+##### of the subject : atan((edge / 2) / (edge * CAMERA_DISTANCE)) #########
+CAMERA_DISTANCE = 3
+CAMERA_TILT = math.atan2(0.5, CAMERA_DISTANCE)
+CONTROLLER_ROTATIONS = {
+    "camera_global": (0, -CAMERA_TILT, 0),
+    "key_global": (0, 0, math.radians(-45)),
+    "fill_global": (0, 0, math.radians(45)),
+    "back_global": (0, math.radians(-80), math.radians(180)),
+}
+
+
+##### places the rig around center for a subject of the given size ###########
+def layout_rig(rig, center, edge, height):
+    orient_rig(rig)
+    update_rig_extent(rig, center, edge, height)
+
+
+##### rotations, they do not depend on the subject ############################
+def orient_rig(rig):
+    rig["camera"].rotation_euler = (math.radians(90), 0, math.radians(90))
+    for light, local_ctrl, global_ctrl in LIGHT_RIGS:
+        rig[light].rotation_euler = (0, math.radians(90), 0)
+    for role, rotation in CONTROLLER_ROTATIONS.items():
+        rig[role].rotation_euler = rotation
+
+
+##### everything that follows the subject size : distances, sizes, ##########
+##### energies and the background. Rotations the user made are kept. #########
+##### parent inverses are the ones parenting at creation time gives ##########
+def update_rig_extent(rig, center, edge, height):
+    cam_dist = edge * CAMERA_DISTANCE
+    key_light_dist = cam_dist
+    fill_light_dist = cam_dist * 1.5
+    back_light_dist = cam_dist * 0.75
+    to_center = mathutils.Matrix.Translation(-center)
+
+    rig["root"].location = center
+
+    ##### camera #########################################################
+    with phase("camera"):
+        cam = rig["camera"]
+        cam.location = center + mathutils.Vector((cam_dist, 0, 0))
+        cam.scale = (edge/2, edge/2, edge/2)
+        cam.matrix_parent_inverse = mathutils.Matrix.Translation(-cam.location)
+        rig["camera_local"].location = cam.location
+        rig["camera_local"].matrix_parent_inverse = to_center
+        rig["camera_global"].location = center
+        set_circle_radius(rig["camera_global"].data, cam_dist)
+
+    ##### background #####################################################
+    with phase("background"):
+        build_background_mesh(rig["background"].data, center, edge, height)
+
+    ##### light rigs #####################################################
+    key_light_strength = edge * pow((edge*3), 2) # * 100 # (edge*3) * 36 # TODO: debug
+    light_settings = {
+        # light : (size, energy, local controller x, distance)
+        "key_light": (edge, key_light_strength, center.x + cam_dist, key_light_dist),
+        "fill_light": (edge*3, key_light_strength * 3 / 2, cam_dist * 1.5, fill_light_dist),
+        "back_light": (edge, None, cam_dist, back_light_dist),
+    }
+    for light, local_ctrl, global_ctrl in LIGHT_RIGS:
+        with phase(light):
+            size, energy, local_x, dist = light_settings[light]
+            rig[light].location = center
+            rig[light].scale = (size, size, size)
+            rig[light].matrix_parent_inverse = to_center
+            if energy is not None:
+                rig[light].data.energy = energy
+            rig[local_ctrl].location = (local_x, center.y, center.z)
+            rig[local_ctrl].matrix_parent_inverse = to_center
+            rig[global_ctrl].location = center
+            set_circle_radius(rig[global_ctrl].data, dist)
+
+    ##### root ##########################################################
+    with phase("root"):
+        for role in ("camera_global", "background", "key_global", "fill_global", "back_global"):
+            rig[role].matrix_parent_inverse = to_center
+
+
+##### live mode ###############################################################
+##### The subject extent is cached on the rig descriptor. When live mode is on,
+##### subject updates start a timer and the rig follows the new extent once
+##### the subject stopped changing for LIVE_UPDATE_DELAY seconds, instead of
+##### on every depsgraph update.
+LIVE_UPDATE_DELAY = 0.3
+_live_timers = {}
+
+
+##### edge, height and center of the subjects, measured and centered like generation did #####
+def measure_subjects(scene, subjects):
+    bounds_min, bounds_max = get_world_bounds(subjects, bpy.context.evaluated_depsgraph_get(),
+                                              scene.render_rig.use_evaluated, not scene.render_rig.fast_bounds)
+    length, width, height = bounds_max - bounds_min
+    center = (bounds_min + bounds_max) / 2 if scene.render_rig.use_selection else subjects[0].location.copy()
+    return max([width, length, height]), height, center
+
+
+def apply_rig_extent(scene, center=None):
+    """ Resizes the rig from the cached extent, around center or where the rig is """
+    rig = get_rig(scene)
+    if rig is None or scene.render_rig.edge <= 0:
+        return
+    if center is None:
+        center = rig["root"].location.copy()
+    update_rig_extent(rig, center, scene.render_rig.edge, scene.render_rig.height)
+
+
+def update_live_rig(scene_name):
+    _live_timers.pop(scene_name, None)
+    scene = bpy.data.scenes.get(scene_name)
+    if scene is None or not scene.render_rig.live:
+        return None
+    subjects = get_subjects(scene)
+    if not subjects:
+        return None
+    edge, height, center = measure_subjects(scene, subjects)
+    if edge <= 0:
+        return None
+    root = scene.render_rig.root
+    moved = root is not None and (center - root.location).length > 1e-6
+    if moved or abs(edge - scene.render_rig.edge) > 1e-6 or abs(height - scene.render_rig.height) > 1e-6:
+        store_extent(scene, edge=edge, height=height)
+        apply_rig_extent(scene, center)
+    return None
+
+
+def schedule_live_update(scene):
+    timer = _live_timers.get(scene.name)
+    if timer is not None and bpy.app.timers.is_registered(timer):
+        bpy.app.timers.unregister(timer)
+    timer = _live_timers[scene.name] = lambda: update_live_rig(scene.name)
+    bpy.app.timers.register(timer, first_interval=LIVE_UPDATE_DELAY)
+
+
+@bpy.app.handlers.persistent
+def render_rig_live_handler(scene, depsgraph):
+    if not scene.render_rig.live:
+        return
+    subjects = {item.object for item in scene.render_rig.subjects if item.object is not None}
+    if not subjects:
+        return
+    for update in depsgraph.updates:
+        if update.id.original in subjects and (update.is_updated_geometry or update.is_updated_transform):
+            schedule_live_update(scene)
+            return
+
 
 class OBJECT_OT_generate_render_setup(bpy.types.Operator):
     bl_label = "Generate Render Setup"
     bl_idname = "mesh.generate_render_setup"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    use_evaluated: bpy.props.BoolProperty(name="Use Modifiers", default=False,
+                                          description="Measure the mesh with its modifiers applied")
+    use_selection: bpy.props.BoolProperty(name="All Selected Objects", default=False,
+                                          description="Frame the combined bounds of all selected objects")
+    fast_bounds: bpy.props.BoolProperty(name="Fast Bounds", default=False,
+                                        description="Use the bounding box corners instead of every vertex")
     
     def execute(self, context):
-        if "Light Rig Root" in bpy.data.objects:
+        if has_rig(context.scene):
             raise Exception("There is already a light rig in your scene.")
         selected = bpy.context.active_object
-        mesh_data = selected.data
-
-        ##### get mesh height #########################
-        max_x = min_x = max_y = min_y = max_z = min_z = 0
-        for vert in mesh_data.vertices:
-            co_world = selected.matrix_world @ vert.co
-            min_x = min(min_x, co_world.x)
-            max_x = max(max_x, co_world.x)
-            min_y = min(min_y, co_world.y)
-            max_y = max(max_y, co_world.y)
-            min_z = min(min_z, co_world.z)
-            max_z = max(max_z, co_world.z)
-        width = max_y - min_y
-        length = max_x - min_x
-        height = max_z - min_z
-        edge = max([width, length, height])
-
-        ##### properties ##########################################################
-        cam_dist = edge * 3
-        key_light_dist = cam_dist
-        fill_light_dist = cam_dist * 1.5
-        back_light_dist = cam_dist * 0.75
-
-        ##### camera #########################################################
-        bpy.ops.object.camera_add()
-        cam = bpy.context.active_object
-        cam.name = "main_cam"
-        cam.location[0] = selected.location[0] + cam_dist  # x position
-        cam.location[1] = selected.location[1]                  # y position
-        cam.location[2] = selected.location[2] # + (height / 3)   # z position
-        cam.rotation_euler[2] = math.radians(90)
-        cam.rotation_euler[0] = math.radians(90)
-        cam.scale = (edge/2, edge/2, edge/2)
-        
-        bpy.ops.curve.primitive_bezier_circle_add() # camera local controller
-        cam_local_ctrl = bpy.context.object
-        cam_local_ctrl.name = "Camera Local Controller"
-        cam_local_ctrl.location = cam.location
-        cam.select_set(True)
-        bpy.ops.object.parent_set(type='OBJECT', keep_transform=False)
-        
-        bpy.ops.curve.primitive_bezier_circle_add() # camera global controller
-        cam_global_ctrl = bpy.context.object
-        cam_global_ctrl.name = "Camera Global Controller"
-        cam_global_ctrl.location = selected.location
-        cam_global_ctrl.scale = (cam_dist, cam_dist, cam_dist)
-        bpy.ops.object.transform_apply(location=False, rotation=True, scale=True)
-        cam_local_ctrl.select_set(True)
-        bpy.ops.object.parent_set(type='OBJECT', keep_transform=False)
-        hypotenuse = math.sqrt(math.pow(cam_dist, 2) + math.pow(edge/2, 2))
-        angle = math.radians(90) - (math.asin(cam_dist/hypotenuse))
-        cam_global_ctrl.rotation_euler[1] = angle * -1
-
-        ##### background #####################################################
-        bpy.ops.mesh.primitive_plane_add()
-        plane = bpy.context.active_object
-        plane.name = "Background"
-        plane.dimensions = (edge * 2 , edge * 3, 0)
-        plane.location = selected.location - mathutils.Vector((0, 0, height / 2 + height / 10))
-        bpy.ops.object.editmode_toggle()
-        bpy.ops.mesh.select_all(action='DESELECT')
-        bm_plane = bmesh.from_edit_mesh(plane.data)
-        bm_plane.edges.ensure_lookup_table()
-        bm_plane.edges[0].select = True
-        bpy.ops.mesh.extrude_region_move(TRANSFORM_OT_translate={"value":(0, 0, edge * 2)})
-        bpy.ops.object.editmode_toggle()
-        new_bevel_mod = plane.modifiers.new("bevel_mod", 'BEVEL')
-        new_bevel_mod.offset_type = 'PERCENT'
-        new_bevel_mod.width_pct = 20
-        new_bevel_mod.segments = 10
-        bpy.ops.object.shade_smooth()
-        bpy.ops.object.transform_apply(location=True, rotation=True, scale=True)
-
-        ##### key light rig ############################################################
-        bpy.ops.object.light_add(type='AREA') # key light
-        key_light = bpy.context.active_object
-        key_light.name = "Key Light"
-        key_light.location = selected.location
-        key_light.rotation_euler[1] = math.radians(90)
-        key_light.scale = (edge, edge, edge)
-        key_light_strength = key_light.scale[0] * pow((edge*3), 2) # * 100 # (edge*3) * 36 # TODO: debug
-        key_light.data.energy = key_light_strength
-
-        bpy.ops.curve.primitive_bezier_circle_add() # key light local controller
-        key_light_local_ctrl = bpy.context.active_object
-        key_light_local_ctrl.name = "Key Light Local Controller"
-        key_light_local_ctrl.location = selected.location
-        key_light.select_set(True)
-        bpy.ops.object.parent_set(type='OBJECT', keep_transform=False)
-        key_light_local_ctrl.location[0] = cam.location[0] # translate func. ?
-
-        bpy.ops.curve.primitive_bezier_circle_add() # key light global controller
-        key_light_global_ctrl = bpy.context.active_object
-        key_light_global_ctrl.name = "Key Light Global Controller"
-        key_light_global_ctrl.location = selected.location
-        key_light_global_ctrl.scale = (key_light_dist, key_light_dist, key_light_dist)
-        bpy.ops.object.transform_apply(location=False, rotation=False, scale=True)
-        key_light_local_ctrl.select_set(True)
-        bpy.ops.object.parent_set(type='OBJECT', keep_transform=False)
-        key_light_global_ctrl.rotation_euler[2] = math.radians(-45)
-
-        ##### fill light rig ############################################################
-        bpy.ops.object.light_add(type='AREA') # fill light
-        fill_light = bpy.context.active_object
-        fill_light.name = "Fill Light"
-        fill_light.location = selected.location
-        fill_light.rotation_euler[1] = math.radians(90)
-        fill_light.scale = (edge*3, edge*3, edge*3)
-        fill_light_strength = key_light_strength * 3 / 2
-        fill_light.data.energy = fill_light_strength
-
-        bpy.ops.curve.primitive_bezier_circle_add() # fill light local controller
-        fill_light_local_ctrl = bpy.context.active_object
-        fill_light_local_ctrl.name = "Fill Light Local Controller"
-        fill_light_local_ctrl.location = selected.location
-        fill_light.select_set(True)
-        bpy.ops.object.parent_set(type='OBJECT', keep_transform=False)
-        fill_light_local_ctrl.location[0] = cam_dist * 1.5
-
-        bpy.ops.curve.primitive_bezier_circle_add() # fill light global controller
-        fill_light_global_ctrl = bpy.context.active_object
-        fill_light_global_ctrl.name = "Fill Light Global Controller"
-        fill_light_global_ctrl.location = selected.location
-        fill_light_global_ctrl.scale = (fill_light_dist, fill_light_dist, fill_light_dist)
-        bpy.ops.object.transform_apply(location=False, rotation=False, scale=True)
-        fill_light_local_ctrl.select_set(True)
-        bpy.ops.object.parent_set(type='OBJECT', keep_transform=False)
-        fill_light_global_ctrl.rotation_euler[2] = math.radians(45)
-
-        ##### back light rig ############################################################
-        bpy.ops.object.light_add(type='AREA') # back light
-        back_light = bpy.context.active_object
-        back_light.name = "Back Light"
-        back_light.location = selected.location
-        back_light.rotation_euler[1] = math.radians(90)
-        back_light.scale = (edge, edge, edge)
-
-        bpy.ops.curve.primitive_bezier_circle_add() # back light local controller
-        back_light_local_ctrl = bpy.context.active_object
-        back_light_local_ctrl.name = "Back Light Local Controller"
-        back_light_local_ctrl.location = selected.location
-        back_light.select_set(True)
-        bpy.ops.object.parent_set(type='OBJECT', keep_transform=False)
-        back_light_local_ctrl.location[0] = cam_dist
-
-        bpy.ops.curve.primitive_bezier_circle_add() # back light global controller
-        back_light_global_ctrl = bpy.context.active_object
-        back_light_global_ctrl.name = "Back Light Global Controller"
-        back_light_global_ctrl.location = selected.location
-        back_light_global_ctrl.scale = (back_light_dist, back_light_dist, back_light_dist)
-        bpy.ops.object.transform_apply(location=False, rotation=False, scale=True)
-        back_light_local_ctrl.select_set(True)
-        bpy.ops.object.parent_set(type='OBJECT', keep_transform=False)
-        back_light_global_ctrl.rotation_euler[2] = math.radians(180)
-        back_light_global_ctrl.rotation_euler[1] += math.radians(-80)
-        
-        ##### root ##########################################################
-        bpy.ops.object.empty_add(location=selected.location)
-        root = bpy.context.object
-        root.name = "Light Rig Root"
-        cam_global_ctrl.select_set(True)
-        plane.select_set(True)
-        key_light_global_ctrl.select_set(True)
-        fill_light_global_ctrl.select_set(True)
-        back_light_global_ctrl.select_set(True)
-        bpy.ops.object.parent_set(type='OBJECT', keep_transform=False)
-        
-
-        for obj in bpy.context.scene.objects:
-            obj.lock_location[0] = True
-            obj.lock_location[1] = True
-            obj.lock_location[2] = True
-            obj.lock_rotation[0] = True
-            obj.lock_rotation[1] = True
-            obj.lock_rotation[2] = True
-            obj.lock_scale[0] = True
-            obj.lock_scale[1] = True
-            obj.lock_scale[2] = True
+        if selected is None and not self.use_selection:
+            self.report({'ERROR'}, "Select the mesh to render first")
+            return {'CANCELLED'}
+        with profile(self.bl_label):
+            ##### get mesh height #########################
+            with phase("bounds"):
+                subjects = context.selected_objects if self.use_selection else [selected]
+                bounds_min, bounds_max = get_world_bounds(subjects, context.evaluated_depsgraph_get(),
+                                                          self.use_evaluated, not self.fast_bounds)
+                length, width, height = bounds_max - bounds_min
+                edge = max([width, length, height])
+            if edge <= 0:
+                self.report({'ERROR'}, "The selection has no geometry to frame")
+                return {'CANCELLED'}
+
+            with phase("create"):
+                rig = create_rig(context.collection)
+            ##### combined bounds are framed around their center, one subject around its origin #####
+            center = (bounds_min + bounds_max) / 2 if self.use_selection else selected.location.copy()
+            layout_rig(rig, center, edge, height)
+            with phase("locking"):
+                store_rig(context.scene, rig)
+                store_subjects(context.scene, subjects, self.use_evaluated, self.fast_bounds, self.use_selection)
+                store_extent(context.scene, edge, height)
+                lock_transforms(rig.values())
         return {'FINISHED'}
 
 
@@ -220,29 +505,30 @@ class OBJECT_OT_generate_render_setup(bpy.types.Operator):
 ####################################################################################################
 
 
+##### transforms the reset puts back, per rig role #####
+RESET_TRANSFORMS = {
+    "camera_local": {"rotation_euler": (0, 0, 0)},
+    "background": {"scale": (1, 1, 1), "location": (0, 0, 0)},
+    "key_local": {"rotation_euler": (0, 0, 0)},
+    "fill_local": {"rotation_euler": (0, 0, 0)},
+    "back_local": {"rotation_euler": (0, 0, 0)},
+}
+RESET_TRANSFORMS.update({role: {"scale": (1, 1, 1), "rotation_euler": rotation}
+                         for role, rotation in CONTROLLER_ROTATIONS.items()})
+
+
 class OBJECT_OT_reset_rig_transforms(bpy.types.Operator):
     bl_label = "Reset Light Rig Transformations"
     bl_idname = "mesh.reset_rig_transforms"
     
     def execute(self, context):
-        context.scene.objects['Camera Global Controller'].scale = (1, 1, 1)
-        context.scene.objects['Camera Global Controller'].rotation_euler = (0, math.radians(-9.46), 0)
-        context.scene.objects['Camera Local Controller'].rotation_euler = (0, 0, 0)
-        
-        context.scene.objects['Background'].scale = (1, 1, 1)
-        context.scene.objects['Background'].location = (0, 0, 0)
-        
-        context.scene.objects['Key Light Global Controller'].scale = (1, 1, 1)
-        context.scene.objects['Key Light Global Controller'].rotation_euler = (0, 0, math.radians(-45))
-        context.scene.objects['Key Light Local Controller'].rotation_euler =(0, 0, 0)
-        
-        context.scene.objects['Fill Light Global Controller'].scale = (1, 1, 1)
-        context.scene.objects['Fill Light Global Controller'].rotation_euler = (0, 0, math.radians(45))
-        context.scene.objects['Fill Light Local Controller'].rotation_euler = (0, 0, 0)
-        
-        context.scene.objects['Back Light Global Controller'].scale = (1, 1, 1)
-        context.scene.objects['Back Light Global Controller'].rotation_euler = (0, math.radians(-80), math.radians(180))
-        context.scene.objects['Back Light Local Controller'].rotation_euler = (0, 0, 0)
+        for role, transforms in RESET_TRANSFORMS.items():
+            obj = get_rig_object(context.scene, role)
+            if obj is None:
+                continue
+            for attribute, value in transforms.items():
+                setattr(obj, attribute, value)
+        apply_rig_extent(context.scene)
         return {'FINISHED'}
 
 ####################################################################################################
@@ -252,22 +538,12 @@ class OBJECT_OT_reset_rig_transforms(bpy.types.Operator):
 class OBJECT_OT_clear_render_setup(bpy.types.Operator):
     bl_label = "Clear Render Setup"
     bl_idname = "mesh.clear_render_setup"
+    bl_options = {'REGISTER', 'UNDO'}
     
     def execute(self, context):
-        for obj in bpy.context.scene.objects:
-            if obj in bpy.context.scene.objects['Light Rig Root'].children:
-                obj.select_set(True)
-                if len(obj.children) > 0:
-                    for child in obj.children:
-                        child.select_set(True)
-                        if len(child.children) > 0:
-                            for grandchild in child.children:
-                                grandchild.select_set(True)
-            else:
-                obj.select_set(False)
-                
-        bpy.context.scene.objects['Light Rig Root'].select_set(True)
-        bpy.ops.object.delete()
+        if not has_rig(context.scene):
+            return {'CANCELLED'}
+        remove_rig(context.scene)
         return {'FINISHED'}
 
 
@@ -275,6 +551,63 @@ class OBJECT_OT_clear_render_setup(bpy.types.Operator):
 ####################################################################################################
 
 
+##### the profile is kept for the Blender session, not saved with the file #####
+def on_profiling_update(window_manager, context):
+    PhaseProfiler.profiler.enable(window_manager.render_setup_profiling)
+
+
+class OBJECT_OT_export_phase_profile(bpy.types.Operator):
+    """ Writes the last phase profile to a file """
+    bl_label = "Export Phase Profile"
+    bl_idname = "mesh.export_phase_profile"
+
+    filepath: bpy.props.StringProperty(subtype='FILE_PATH')
+    filter_glob: bpy.props.StringProperty(default="*.json", options={'HIDDEN'})
+    export_format: bpy.props.EnumProperty(name="Format", items=getattr(PhaseProfiler, "EXPORT_FORMATS", []))
+
+    @classmethod
+    def poll(cls, context):
+        return PhaseProfiler is not None and bool(PhaseProfiler.profiler.records)
+
+    def invoke(self, context, event):
+        if not self.filepath:
+            self.filepath = "phase_profile.json"
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+    def execute(self, context):
+        PhaseProfiler.profiler.export(bpy.path.abspath(self.filepath), self.export_format)
+        self.report({'INFO'}, "Phase profile written to " + self.filepath)
+        return {'FINISHED'}
+
+
+####################################################################################################
+####################################################################################################
+
+
+##### (section title, [(rig role, property, label)]) shown in the panel #####
+PANEL_SECTIONS = (
+    ("Camera Properties", [("camera_global", "scale", "Camera Distance"),
+                           ("camera_global", "rotation_euler", "Camera Global Rotation"),
+                           ("camera_local", "rotation_euler", "Camera Local Rotation"),
+                           ("camera", "scale", "Camera Size")]),
+    ("Background Properties", [("background", "scale", "Background Scale"),
+                               ("background", "location", "Background Location")]),
+    ("Key Light Properties", [("key_global", "scale", "Key Light Distance"),
+                              ("key_global", "rotation_euler", "Key Light Global Rotation"),
+                              ("key_local", "rotation_euler", "Key Light Local Rotation"),
+                              ("key_light", "scale", "Key Light Size")]),
+    ("Fill Light Properties", [("fill_global", "scale", "Fill Light Distance"),
+                               ("fill_global", "rotation_euler", "Fill Light Global Rotation"),
+                               ("fill_local", "rotation_euler", "Fill Light Local Rotation"),
+                               ("fill_light", "scale", "Fill Light Size")]),
+    ("Back Light Properties", [("back_global", "scale", "Back Light Distance"),
+                               ("back_global", "rotation_euler", "Back Light Global Rotation"),
+                               ("back_local", "rotation_euler", "Back Light Local Rotation"),
+                               ("back_light", "scale", "Back Light Size")]),
+)
+
+
 class RenderSetupGeneratorPanel(bpy.types.Panel):
     """ Creates a render setup with 3-key lighting """
     bl_label = "Render Setup Generator"
@@ -287,57 +620,51 @@ class RenderSetupGeneratorPanel(bpy.types.Panel):
         layout = self.layout
         layout.label(text="Select a mesh and hit 'Generate Render Setup' to") 
         layout.label(text=" create a 3-key lighting rig.")
-        layout.label(text="!! Do not change the names of elements in the rig !!")
         layout.label(text="")
         layout.operator(OBJECT_OT_generate_render_setup.bl_idname, text="Generate Render Setup") # for selected mesh
+        if PhaseProfiler is not None:
+            self.draw_profile(context)
         
-        if "Light Rig Root" not in bpy.data.objects:
+        if not has_rig(context.scene):
             return
         
         layout.operator(OBJECT_OT_reset_rig_transforms.bl_idname, text="Reset Transformations")
         layout.operator(OBJECT_OT_clear_render_setup.bl_idname, text="Clear Render Setup")
         
-        row = layout.row()
-        row.label(text=("Camera Properties"))
-        col = row.column(align=True)
-        col.prop(context.scene.objects['Camera Global Controller'], "scale", text="Camera Distance")
-        col.prop(context.scene.objects['Camera Global Controller'], "rotation_euler", text="Camera Global Rotation")
-        col.prop(context.scene.objects['Camera Local Controller'], "rotation_euler", text="Camera Local Rotation")
-        col.prop(context.scene.objects['main_cam'], "scale", text="Camera Size")
-        
+        col = layout.column(align=True)
+        col.prop(context.scene.render_rig, "live")
+        col.prop(context.scene.render_rig, "edge")
+        col.prop(context.scene.render_rig, "height")
         layout.label(text="")
-        row = layout.row()
-        row.label(text="Background Properties")
-        col = row.column(align=True)
-        col.prop(context.scene.objects['Background'], "scale", text="Background Scale")
-        col.prop(context.scene.objects['Background'], "location", text="Background Location")
         
-        layout.label(text="")
-        row = layout.row()
-        row.label(text="Key Light Properties")
-        col = row.column(align=True)
-        col.prop(context.scene.objects['Key Light Global Controller'], "scale", text="Key Light Distance")
-        col.prop(context.scene.objects['Key Light Global Controller'], "rotation_euler", text="Key Light Global Rotation")
-        col.prop(context.scene.objects['Key Light Local Controller'], "rotation_euler", text="Key Light Local Rotation")
-        col.prop(context.scene.objects['Key Light'], "scale", text="Key Light Size")
-        
-        layout.label(text="")
-        row = layout.row()
-        row.label(text="Fill Light Properties")
-        col = row.column(align=True)
-        col.prop(context.scene.objects['Fill Light Global Controller'], "scale", text="Fill Light Distance")
-        col.prop(context.scene.objects['Fill Light Global Controller'], "rotation_euler", text="Fill Light Global Rotation")
-        col.prop(context.scene.objects['Fill Light Local Controller'], "rotation_euler", text="Fill Light Local Rotation")
-        col.prop(context.scene.objects['Fill Light'], "scale", text="Fill Light Size")
-        
-        layout.label(text="")
-        row = layout.row()
-        row.label(text="Back Light Properties")
-        col = row.column(align=True)
-        col.prop(context.scene.objects['Back Light Global Controller'], "scale", text="Back Light Distance")
-        col.prop(context.scene.objects['Back Light Global Controller'], "rotation_euler", text="Back Light Global Rotation")
-        col.prop(context.scene.objects['Back Light Local Controller'], "rotation_euler", text="Back Light Local Rotation")
-        col.prop(context.scene.objects['Back Light'], "scale", text="Back Light Size")
+        for n, (title, props) in enumerate(PANEL_SECTIONS):
+            if n > 0:
+                layout.label(text="")
+            row = layout.row()
+            row.label(text=title)
+            col = row.column(align=True)
+            for role, prop, text in props:
+                obj = get_rig_object(context.scene, role)
+                if obj is None:
+                    col.label(text=text + " (missing)")
+                else:
+                    col.prop(obj, prop, text=text)
+
+    def draw_profile(self, context):
+        box = self.layout.box()
+        box.prop(context.window_manager, "render_setup_profiling")
+        profiler = PhaseProfiler.profiler
+        if not profiler.records:
+            return
+        col = box.column(align=True)
+        col.label(text=profiler.label)
+        for total in profiler.summary():
+            row = col.row()
+            row.label(text="  " * total["depth"] + total["name"])
+            row.label(text="%.2f ms" % (total["seconds"] * 1000))
+            row.label(text="%d ops" % total["operators"])
+            row.label(text="+%d objects" % total["objects_created"])
+        box.operator(OBJECT_OT_export_phase_profile.bl_idname)
 
 
 ####################################################################################################
@@ -345,16 +672,37 @@ class RenderSetupGeneratorPanel(bpy.types.Panel):
 
 
 def register():
+    bpy.utils.register_class(RenderRigSubject)
+    bpy.utils.register_class(RenderRigDescriptor)
+    bpy.types.Scene.render_rig = bpy.props.PointerProperty(type=RenderRigDescriptor)
+    bpy.app.handlers.depsgraph_update_post.append(render_rig_live_handler)
     bpy.utils.register_class(OBJECT_OT_generate_render_setup)
     bpy.utils.register_class(OBJECT_OT_reset_rig_transforms)
     bpy.utils.register_class(OBJECT_OT_clear_render_setup)
+    if PhaseProfiler is not None:
+        bpy.types.WindowManager.render_setup_profiling = bpy.props.BoolProperty(
+            name="Profile Phases", default=False, update=on_profiling_update,
+            description="Time the phases of 'Generate Render Setup'")
+        bpy.utils.register_class(OBJECT_OT_export_phase_profile)
     bpy.utils.register_class(RenderSetupGeneratorPanel)
 
 def unregister():
+    bpy.app.handlers.depsgraph_update_post.remove(render_rig_live_handler)
+    for timer in _live_timers.values():
+        if bpy.app.timers.is_registered(timer):
+            bpy.app.timers.unregister(timer)
+    _live_timers.clear()
     bpy.utils.unregister_class(OBJECT_OT_generate_render_setup)
     bpy.utils.unregister_class(OBJECT_OT_reset_rig_transforms)
     bpy.utils.unregister_class(OBJECT_OT_clear_render_setup)
+    if PhaseProfiler is not None:
+        PhaseProfiler.profiler.enable(False)
+        bpy.utils.unregister_class(OBJECT_OT_export_phase_profile)
+        del bpy.types.WindowManager.render_setup_profiling
     bpy.utils.unregister_class(RenderSetupGeneratorPanel)
+    del bpy.types.Scene.render_rig
+    bpy.utils.unregister_class(RenderRigDescriptor)
+    bpy.utils.unregister_class(RenderRigSubject)
     
 if __name__ == "__main__":
     register()
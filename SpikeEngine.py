@@ -0,0 +1,137 @@
+###########################################################################
+##### Spike Engine ########################################################
+##### author : Efe Ulgen ##################################################
+###########################################################################
+##### Blender independent spike construction for MakeSpikePattern.py.
+##### Every face becomes a fan of triangles around an apex at the face
+##### center moved along the face normal, the same topology as extruding
+##### the faces and merging each of them at center. Height, tip sharpness
+##### and on / off can be given per face. All faces are done in one pass
+##### over flat foreach_get style buffers.
+###########################################################################
+
+import numpy as np
+
+
+def face_means(values, loop_start):
+    """ Mean of a per loop value over the loops of every face """
+    loop_total = np.diff(np.append(loop_start, len(values)))
+    sums = np.add.reduceat(values, loop_start, axis=0)
+    return sums / loop_total.reshape((-1,) + (1,) * (values.ndim - 1))
+
+
+def next_loops(loop_start, loop_total):
+    """ Index of the next loop around the face for every loop """
+    loop_count = int(loop_total.sum())
+    loops = np.arange(loop_count)
+    face_of_loop = np.repeat(np.arange(len(loop_start)), loop_total)
+    following = loops + 1
+    last = loop_start + loop_total - 1
+    following[last] = loop_start
+    return following, face_of_loop
+
+
+def face_normals(co, loop_start, loop_total, loop_verts):
+    """ Newell normals of every face, works for ngons and non planar faces """
+    following, face_of_loop = next_loops(loop_start, loop_total)
+    a = co[loop_verts]
+    b = co[loop_verts[following]]
+    cross = np.stack([(a[:, 1] - b[:, 1]) * (a[:, 2] + b[:, 2]),
+                      (a[:, 2] - b[:, 2]) * (a[:, 0] + b[:, 0]),
+                      (a[:, 0] - b[:, 0]) * (a[:, 1] + b[:, 1])], axis=1)
+    normals = np.add.reduceat(cross, loop_start, axis=0)
+    length = np.linalg.norm(normals, axis=1)
+    length[length == 0] = 1
+    return normals / length[:, None]
+
+
+##### lattice value noise, hashed so the same seed always gives the same field #####
+def _hash_lattice(cells, seed):
+    with np.errstate(over='ignore'):
+        h = np.uint64(seed & 0xFFFFFFFFFFFFFFFF) * np.uint64(0x9E3779B97F4A7C15)
+        for axis, prime in enumerate((0x85EBCA77C2B2AE63, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9)):
+            h = (h ^ cells[..., axis].astype(np.uint64)) * np.uint64(prime)
+            h = h ^ (h >> np.uint64(29))
+    return (h >> np.uint64(11)).astype(np.float64) * (1.0 / (1 << 53))
+
+
+def value_noise(points, scale=1.0, seed=0):
+    """ Smooth 3D value noise in [0, 1] at every point """
+    p = np.asarray(points, dtype=np.float64) * scale
+    cell = np.floor(p).astype(np.int64)
+    f = p - cell
+    f = f * f * (3 - 2 * f)
+    result = np.zeros(len(p))
+    for corner in np.ndindex(2, 2, 2):
+        corner = np.array(corner)
+        weight = np.prod(np.where(corner, f, 1 - f), axis=1)
+        result += weight * _hash_lattice(cell + corner, seed)
+    return result
+
+
+def make_spikes(co, loop_start, loop_total, loop_verts, height=0.1, sharpness=1.0, enabled=True):
+    """ Spikes all enabled faces. height, sharpness and enabled are scalars or one value per face.
+    sharpness 1 merges the tip into one apex, lower values leave a flat tip scaled by (1 - sharpness).
+    Disabled faces are kept as they are.
+    Returns (co, loop_verts, loop_total, polygon_faces, loop_sources, loop_weights) :
+    the old vertices followed by the new ones, the new polygons as flat loops and sizes,
+    the source face of every polygon and, for every new loop, a source loop and the weight
+    of that loop against the face center, to interpolate uvs and other corner values. """
+    co = np.asarray(co, dtype=np.float64).reshape(-1, 3)
+    loop_start = np.asarray(loop_start, dtype=np.int64)
+    loop_total = np.asarray(loop_total, dtype=np.int64)
+    loop_verts = np.asarray(loop_verts, dtype=np.int64)
+    face_count = len(loop_start)
+    height = np.broadcast_to(np.asarray(height, dtype=np.float64), face_count)
+    sharpness = np.broadcast_to(np.asarray(sharpness, dtype=np.float64), face_count)
+    enabled = np.broadcast_to(np.asarray(enabled, dtype=bool), face_count)
+
+    centers = face_means(co[loop_verts], loop_start)
+    normals = face_normals(co, loop_start, loop_total, loop_verts)
+    following, face_of_loop = next_loops(loop_start, loop_total)
+    pointed = enabled & (sharpness >= 1)
+    truncated = enabled & ~pointed
+    tip_scale = np.clip(1 - sharpness, 0, 1)
+
+    ##### one apex per pointed face #####
+    pointed_faces = np.flatnonzero(pointed)
+    apex_index = np.full(face_count, -1, dtype=np.int64)
+    apex_index[pointed_faces] = len(co) + np.arange(len(pointed_faces))
+    apexes = centers[pointed_faces] + normals[pointed_faces] * height[pointed_faces, None]
+
+    ##### one tip vertex per loop of a truncated face #####
+    tip_loops = np.flatnonzero(truncated[face_of_loop])
+    tip_faces = face_of_loop[tip_loops]
+    tip_index = np.full(len(loop_verts), -1, dtype=np.int64)
+    tip_index[tip_loops] = len(co) + len(pointed_faces) + np.arange(len(tip_loops))
+    tips = (centers[tip_faces] + (co[loop_verts[tip_loops]] - centers[tip_faces]) * tip_scale[tip_faces, None]
+            + normals[tip_faces] * height[tip_faces, None])
+
+    ##### pointed faces : a triangle per loop #####
+    pointed_loops = np.flatnonzero(pointed[face_of_loop])
+    triangles = np.stack([loop_verts[pointed_loops], loop_verts[following[pointed_loops]],
+                          apex_index[face_of_loop[pointed_loops]]], axis=1)
+    triangle_sources = np.stack([pointed_loops, following[pointed_loops], pointed_loops], axis=1)
+    triangle_weights = np.broadcast_to([1.0, 1.0, 0.0], triangles.shape)
+
+    ##### truncated faces : a side quad per loop and the tip face #####
+    quads = np.stack([loop_verts[tip_loops], loop_verts[following[tip_loops]],
+                      tip_index[following[tip_loops]], tip_index[tip_loops]], axis=1)
+    quad_sources = np.stack([tip_loops, following[tip_loops], following[tip_loops], tip_loops], axis=1)
+    quad_weights = np.stack([np.ones(len(tip_loops)), np.ones(len(tip_loops)),
+                             tip_scale[tip_faces], tip_scale[tip_faces]], axis=1)
+    truncated_faces = np.flatnonzero(truncated)
+
+    ##### disabled faces are copied #####
+    kept_faces = np.flatnonzero(~enabled)
+    kept_loops = np.flatnonzero(~enabled[face_of_loop])
+
+    new_loop_verts = np.concatenate([triangles.ravel(), quads.ravel(), tip_index[tip_loops], loop_verts[kept_loops]])
+    new_loop_total = np.concatenate([np.full(len(triangles), 3), np.full(len(quads), 4),
+                                     loop_total[truncated_faces], loop_total[kept_faces]])
+    polygon_faces = np.concatenate([face_of_loop[pointed_loops], tip_faces, truncated_faces, kept_faces])
+    loop_sources = np.concatenate([triangle_sources.ravel(), quad_sources.ravel(), tip_loops, kept_loops])
+    loop_weights = np.concatenate([triangle_weights.ravel(), quad_weights.ravel(),
+                                   tip_scale[tip_faces], np.ones(len(kept_loops))])
+    return (np.concatenate([co, apexes, tips]), new_loop_verts, new_loop_total.astype(np.int64),
+            polygon_faces, loop_sources, loop_weights)
@@ -0,0 +1,67 @@
+###############################################
+###### Parallel City Generation Benchmark #####
+###### author : Efe Ulgen #####################
+###############################################
+##### Times CityParallel.generate_tiles_parallel for growing worker counts
+##### and prints the speedup curve. Runs with plain Python and NumPy :
+#####     python benchmarks/bench_city_parallel.py --city-size 1000
+###############################################
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import CityLayout
+import CityParallel
+
+
+def run_serial(city_size, tile_size, seed):
+    faces = 0
+    for tile, bounds, lods in CityLayout.iter_tile_geometry(tile_size, city_size=city_size, seed=seed):
+        faces += len(lods[0][1])
+    return faces
+
+
+def run_parallel(city_size, tile_size, seed, workers):
+    faces = 0
+    for tile, bounds, lods in CityParallel.generate_tiles_parallel(tile_size, workers, city_size=city_size, seed=seed):
+        faces += len(lods[0][1])
+    return faces
+
+
+def worker_counts(max_workers):
+    counts = []
+    workers = 1
+    while workers < max_workers:
+        counts.append(workers)
+        workers *= 2
+    counts.append(max_workers)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--city-size", type=int, default=1000)
+    parser.add_argument("--tile-size", type=int, default=64)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    faces = run_serial(args.city_size, args.tile_size, args.seed)
+    serial_time = time.perf_counter() - start
+    print("city %dx%d, tile %d, %d faces" % (args.city_size, args.city_size, args.tile_size, faces))
+    print("%8s %10s %8s" % ("workers", "seconds", "speedup"))
+    print("%8s %10.3f %8.2f" % ("serial", serial_time, 1.0))
+    for workers in worker_counts(args.max_workers):
+        start = time.perf_counter()
+        run_parallel(args.city_size, args.tile_size, args.seed, workers)
+        elapsed = time.perf_counter() - start
+        print("%8d %10.3f %8.2f" % (workers, elapsed, serial_time / elapsed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+###############################################
+###### Render Setup Generator Benchmark #######
+###### author : Efe Ulgen #####################
+###############################################
+##### Times generating and clearing the light rig in scenes with a growing
+##### number of objects. Runs in headless Blender :
+#####     blender --background --python benchmarks/bench_render_setup.py -- --scene-objects 0 10000 100000
+###############################################
+
+import argparse
+import importlib.util
+import os
+import sys
+import time
+
+import bpy
+
+script_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def load_addon():
+    spec = importlib.util.spec_from_file_location("RenderSetupGenerator", os.path.join(script_dir, "RenderSetupGenerator.py"))
+    addon = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(addon)
+    addon.register()
+    return addon
+
+
+def fill_scene(object_count):
+    bpy.ops.wm.read_factory_settings(use_empty=True)
+    collection = bpy.context.scene.collection
+    for n in range(object_count):
+        collection.objects.link(bpy.data.objects.new("Filler_%d" % n, None))
+    bpy.ops.mesh.primitive_uv_sphere_add()
+    return bpy.context.active_object
+
+
+def main():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scene-objects", type=int, nargs="+", default=[0, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    load_addon()
+    print("%14s %12s %12s" % ("scene objects", "generate s", "clear s"))
+    for object_count in args.scene_objects:
+        subject = fill_scene(object_count)
+        generate_time = clear_time = float("inf")
+        for _ in range(args.repeat):
+            bpy.context.view_layer.objects.active = subject
+            start = time.perf_counter()
+            bpy.ops.mesh.generate_render_setup()
+            generate_time = min(generate_time, time.perf_counter() - start)
+            start = time.perf_counter()
+            bpy.ops.mesh.clear_render_setup()
+            clear_time = min(clear_time, time.perf_counter() - start)
+        print("%14d %12.4f %12.4f" % (object_count, generate_time, clear_time))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+###############################################
+###### Spike Engine Benchmark #################
+###### author : Efe Ulgen #####################
+###############################################
+##### Times SpikeEngine.make_spikes on quad grids from 1k to 1M faces.
+##### Runs with plain Python and NumPy :
+#####     python benchmarks/bench_spike_engine.py
+###############################################
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import SpikeEngine
+
+
+def quad_grid(face_count):
+    """ foreach_get style buffers of a square grid with about face_count quads """
+    side = max(1, int(round(np.sqrt(face_count))))
+    xs, ys = np.meshgrid(np.arange(side + 1), np.arange(side + 1), indexing='ij')
+    co = np.stack([xs.ravel(), ys.ravel(), np.zeros(xs.size)], axis=1).astype(np.float32)
+    corner = (np.arange(side)[:, None] * (side + 1) + np.arange(side)[None, :]).ravel()
+    loop_verts = np.stack([corner, corner + side + 1, corner + side + 2, corner + 1], axis=1).ravel()
+    loop_start = np.arange(0, len(loop_verts), 4, dtype=np.int32)
+    loop_total = np.full(len(loop_start), 4, dtype=np.int32)
+    return co, loop_start, loop_total, loop_verts.astype(np.int32)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--face-counts", type=int, nargs="+", default=[1000, 10000, 100000, 1000000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print("%10s %10s %14s" % ("faces", "seconds", "us per face"))
+    for face_count in args.face_counts:
+        co, loop_start, loop_total, loop_verts = quad_grid(face_count)
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            SpikeEngine.make_spikes(co, loop_start, loop_total, loop_verts)
+            best = min(best, time.perf_counter() - start)
+        print("%10d %10.4f %14.3f" % (len(loop_start), best, best / len(loop_start) * 1e6))
+
+
+if __name__ == "__main__":
+    main()
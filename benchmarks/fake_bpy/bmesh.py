@@ -0,0 +1,54 @@
+###############################################
+###### bmesh stand-in #########################
+###### author : Efe Ulgen #####################
+###############################################
+##### Records bmesh calls in bpy.recorder like the bpy stand-in records
+##### operators. A BMesh only keeps the mesh it was loaded from, bmesh.ops
+##### calls are counted and change nothing.
+###############################################
+
+import bpy
+
+
+class BMesh:
+    def __init__(self):
+        self.mesh = None
+        self.verts = []
+        self.edges = []
+        self.faces = []
+
+    def from_mesh(self, mesh, face_normals=True, use_shape_key=False, shape_key_index=0):
+        bpy.recorder.operators["bmesh.from_mesh"] += 1
+        self.mesh = mesh
+
+    def to_mesh(self, mesh):
+        bpy.recorder.operators["bmesh.to_mesh"] += 1
+
+    def free(self):
+        self.mesh = None
+
+
+def new(use_operators=True):
+    bpy.recorder.created["BMesh"] += 1
+    return BMesh()
+
+
+def from_edit_mesh(mesh):
+    bm = new()
+    bm.from_mesh(mesh)
+    return bm
+
+
+def update_edit_mesh(mesh, loop_triangles=True, destructive=True):
+    bpy.recorder.operators["bmesh.update_edit_mesh"] += 1
+
+
+class _Ops:
+    def __getattr__(self, name):
+        def call(bm, **options):
+            bpy.recorder.operators["bmesh.ops." + name] += 1
+            return {}
+        return call
+
+
+ops = _Ops()
@@ -0,0 +1,1135 @@
+###############################################
+###### bpy stand-in ###########################
+###### author : Efe Ulgen #####################
+###############################################
+##### A recording stand-in for the parts of bpy the scripts of this repo use,
+##### so the benchmarks run on plain Python without Blender. Mesh data lives
+##### in NumPy arrays behind foreach_get / foreach_set, objects, collections,
+##### properties, handlers and timers behave like Blender's for the calls the
+##### scripts make. Every operator call and every datablock created is counted
+##### in `recorder`. Operators the scripts do not depend on only record the
+##### call, they do not change the scene (mesh editing, importers, render).
+###############################################
+
+import collections
+import itertools
+import math
+
+import numpy as np
+
+import mathutils
+
+
+class Recorder:
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.operators = collections.Counter()
+        self.created = collections.Counter()
+
+    def snapshot(self):
+        return {"operators": dict(self.operators), "created": dict(self.created)}
+
+
+recorder = Recorder()
+
+
+##### properties ##############################################################
+class _Property:
+    _defaults = {'BOOLEAN': False, 'INT': 0, 'FLOAT': 0.0, 'STRING': "", 'POINTER': None}
+
+    def __init__(self, kind, **options):
+        self.kind = kind
+        self.name = None
+        self.options = options
+
+    def default(self):
+        if "default" in self.options:
+            return self.options["default"]
+        if self.kind == 'ENUM':
+            items = self.options.get("items") or [("",)]
+            return items[0][0]
+        if self.kind == 'FLOAT_VECTOR':
+            return (0.0,) * self.options.get("size", 3)
+        return self._defaults[self.kind]
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        values = instance.__dict__.setdefault("_properties", {})
+        if self.name not in values:
+            property_type = self.options.get("type")
+            if self.kind == 'POINTER' and isinstance(property_type, type) and issubclass(property_type, PropertyGroup):
+                group = property_type()
+                group.id_data = getattr(instance, "id_data", instance)
+                values[self.name] = group
+            elif self.kind == 'COLLECTION':
+                values[self.name] = _PropertyCollection(property_type, getattr(instance, "id_data", instance))
+            else:
+                values[self.name] = self.default()
+        value = values[self.name]
+        if isinstance(value, ID) and value._removed:
+            values[self.name] = value = None
+        return value
+
+    def __set__(self, instance, value):
+        instance.__dict__.setdefault("_properties", {})[self.name] = value
+        update = self.options.get("update")
+        if update is not None:
+            update(instance, context)
+
+
+class _Props:
+    BoolProperty = staticmethod(lambda **options: _Property('BOOLEAN', **options))
+    IntProperty = staticmethod(lambda **options: _Property('INT', **options))
+    FloatProperty = staticmethod(lambda **options: _Property('FLOAT', **options))
+    StringProperty = staticmethod(lambda **options: _Property('STRING', **options))
+    EnumProperty = staticmethod(lambda **options: _Property('ENUM', **options))
+    PointerProperty = staticmethod(lambda **options: _Property('POINTER', **options))
+    CollectionProperty = staticmethod(lambda **options: _Property('COLLECTION', **options))
+    FloatVectorProperty = staticmethod(lambda **options: _Property('FLOAT_VECTOR', **options))
+
+
+props = _Props()
+
+
+class _StructMeta(type):
+    """ Names the properties assigned to a type after it was created, like bpy.types.Scene.x = Property """
+    def __setattr__(cls, name, value):
+        if isinstance(value, _Property):
+            value.name = name
+        super().__setattr__(name, value)
+
+
+class bpy_struct(metaclass=_StructMeta):
+    pass
+
+
+class PropertyGroup(bpy_struct):
+    id_data = None
+
+    def __getitem__(self, name):
+        return self.__dict__.setdefault("_properties", {})[name]
+
+    def __setitem__(self, name, value):
+        ##### item access writes the stored value without the update callback #####
+        self.__dict__.setdefault("_properties", {})[name] = value
+
+    def __contains__(self, name):
+        return name in self.__dict__.get("_properties", {})
+
+
+class _PropertyCollection(list):
+    def __init__(self, item_type, id_data):
+        super().__init__()
+        self._item_type = item_type
+        self._id_data = id_data
+
+    def add(self):
+        item = self._item_type()
+        item.id_data = self._id_data
+        self.append(item)
+        return item
+
+    def remove(self, index):
+        del self[index]
+
+
+##### datablocks ##############################################################
+class _IDProperties(dict):
+    def to_dict(self):
+        return {key: value.to_dict() if isinstance(value, _IDProperties) else value for key, value in self.items()}
+
+
+def _to_id_property(value):
+    if isinstance(value, dict):
+        return _IDProperties({key: _to_id_property(item) for key, item in value.items()})
+    return value
+
+
+class ID(bpy_struct):
+    def __init__(self, name):
+        self._name = name
+        self._owner = None
+        self._removed = False
+        self._custom = {}
+        self._users = 0
+        self.use_fake_user = False
+        self.library = None
+
+    @property
+    def name(self):
+        return self._name
+
+    @name.setter
+    def name(self, value):
+        if self._owner is not None:
+            self._owner._rename(self, value)
+        else:
+            self._name = value
+
+    @property
+    def id_data(self):
+        return self
+
+    @property
+    def original(self):
+        return self
+
+    @property
+    def users(self):
+        return self._users + int(self.use_fake_user)
+
+    def evaluated_get(self, depsgraph):
+        return self
+
+    def __getitem__(self, key):
+        return self._custom[key]
+
+    def __setitem__(self, key, value):
+        self._custom[key] = _to_id_property(value)
+
+    def __contains__(self, key):
+        return key in self._custom
+
+    def get(self, key, default=None):
+        return self._custom.get(key, default)
+
+    def __repr__(self):
+        return "bpy.data.%s[%r]" % (type(self).__name__.lower() + "s", self._name)
+
+
+class _IDCollection:
+    def __init__(self, id_type):
+        self._id_type = id_type
+        self._items = {}
+
+    def _unique(self, name):
+        if name not in self._items:
+            return name
+        for n in itertools.count(1):
+            candidate = "%s.%03d" % (name, n)
+            if candidate not in self._items:
+                return candidate
+
+    def _add(self, block):
+        block._name = self._unique(block._name)
+        block._owner = self
+        self._items[block._name] = block
+        recorder.created[self._id_type.__name__] += 1
+        return block
+
+    def _rename(self, block, name):
+        del self._items[block._name]
+        block._name = self._unique(name)
+        self._items[block._name] = block
+
+    def new(self, name, *args, **kwargs):
+        return self._add(self._id_type(name, *args, **kwargs))
+
+    def remove(self, block, do_unlink=True):
+        _remove_ids([block])
+
+    def get(self, name, default=None):
+        return self._items.get(name, default)
+
+    def keys(self):
+        return self._items.keys()
+
+    def values(self):
+        return list(self._items.values())
+
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            return list(self._items.values())[key]
+        return self._items[key]
+
+    def __contains__(self, key):
+        if isinstance(key, str):
+            return key in self._items
+        return self._items.get(key.name) is key
+
+    def __iter__(self):
+        return iter(list(self._items.values()))
+
+    def __len__(self):
+        return len(self._items)
+
+
+##### mesh ####################################################################
+class _Element:
+    def __init__(self, elements, index):
+        self.__dict__["_elements"] = elements
+        self.__dict__["index"] = index
+
+    def __getattr__(self, name):
+        if name == "groups":
+            return []
+        if name == "vertices" and self._elements._kind == 'POLYGON':
+            return self._elements._mesh._polygon_vertices(self.index)
+        value = self._elements._array(name)[self.index]
+        return mathutils.Vector(value) if np.ndim(value) else value.item()
+
+    def __setattr__(self, name, value):
+        self._elements._array(name)[self.index] = value
+
+
+class _Elements:
+    """ vertices, edges, loops and polygons : one NumPy array per attribute """
+    _fields = {
+        'VERTEX': {"co": (np.float32, 3), "select": (bool, 1), "hide": (bool, 1)},
+        'EDGE': {"vertices": (np.int32, 2), "use_seam": (bool, 1)},
+        'LOOP': {"vertex_index": (np.int32, 1), "edge_index": (np.int32, 1)},
+        'POLYGON': {"loop_start": (np.int32, 1), "loop_total": (np.int32, 1), "material_index": (np.int32, 1),
+                    "use_smooth": (bool, 1), "select": (bool, 1)},
+        'VALUE': {"value": (np.float32, 1)},
+        'UV': {"uv": (np.float32, 2)},
+    }
+
+    def __init__(self, mesh, kind, dtypes=None):
+        self._mesh = mesh
+        self._kind = kind
+        self._data = {}
+        self._count = 0
+        self._dtypes = dict(self._fields[kind])
+        self._dtypes.update(dtypes or {})
+
+    def _array(self, name):
+        if name not in self._data:
+            dtype, width = self._dtypes[name]
+            self._data[name] = np.zeros((self._count, width) if width > 1 else self._count, dtype=dtype)
+        if name == "loop_total" and self._mesh is not None:
+            self._mesh._update_loop_total()
+        return self._data[name]
+
+    def add(self, count):
+        for name, array in self._data.items():
+            self._data[name] = np.concatenate([array, np.zeros((count,) + array.shape[1:], dtype=array.dtype)])
+        self._count += count
+
+    def _resize(self, count):
+        self._data = {}
+        self._count = count
+
+    def foreach_set(self, name, values):
+        array = self._array(name)
+        array[...] = np.asarray(values, dtype=array.dtype).reshape(array.shape)
+
+    def foreach_get(self, name, values):
+        flat = self._array(name).ravel()
+        if isinstance(values, np.ndarray):
+            values[...] = flat.reshape(values.shape)
+        else:
+            values[:] = flat.tolist()
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        return (_Element(self, n) for n in range(self._count))
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError(index)
+        return _Element(self, index)
+
+
+class _Attribute:
+    def __init__(self, mesh, name, data_type, domain):
+        self.name = name
+        self.data_type = data_type
+        self.domain = domain
+        dtype = {'FLOAT': np.float32, 'INT': np.int32, 'INT8': np.int8, 'BOOLEAN': bool}.get(data_type, np.float32)
+        self.data = _Elements(None, 'VALUE', {"value": (dtype, 1)})
+        self.data._resize({'POINT': len(mesh.vertices), 'EDGE': len(mesh.edges), 'CORNER': len(mesh.loops),
+                           'FACE': len(mesh.polygons)}[domain])
+
+
+class _UVLayer:
+    def __init__(self, mesh, name):
+        self.name = name
+        self.data = _Elements(None, 'UV')
+        self.data._resize(len(mesh.loops))
+
+
+class _NamedList(list):
+    def get(self, name, default=None):
+        return next((item for item in self if item.name == name), default)
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            item = self.get(key)
+            if item is None:
+                raise KeyError(key)
+            return item
+        return super().__getitem__(key)
+
+    def __contains__(self, key):
+        if isinstance(key, str):
+            return self.get(key) is not None
+        return super().__contains__(key)
+
+
+class _Attributes(_NamedList):
+    def __init__(self, mesh):
+        super().__init__()
+        self._mesh = mesh
+
+    def new(self, name, type, domain):
+        attribute = _Attribute(self._mesh, name, type, domain)
+        self.append(attribute)
+        return attribute
+
+
+class _UVLayers(_NamedList):
+    def __init__(self, mesh):
+        super().__init__()
+        self._mesh = mesh
+
+    def new(self, name="UVMap", do_init=True):
+        layer = _UVLayer(self._mesh, name)
+        self.append(layer)
+        return layer
+
+
+class Mesh(ID):
+    def __init__(self, name):
+        super().__init__(name)
+        self.materials = []
+        self.clear_geometry()
+
+    def clear_geometry(self):
+        self.vertices = _Elements(self, 'VERTEX')
+        self.edges = _Elements(self, 'EDGE')
+        self.loops = _Elements(self, 'LOOP')
+        self.polygons = _Elements(self, 'POLYGON')
+        self.attributes = _Attributes(self)
+        self.uv_layers = _UVLayers(self)
+
+    def _update_loop_total(self):
+        if app.version >= (4, 0, 0) and "loop_start" in self.polygons._data:
+            loop_start = self.polygons._data["loop_start"]
+            self.polygons._data["loop_total"] = np.diff(np.append(loop_start, len(self.loops))).astype(np.int32)
+
+    def _polygon_vertices(self, index):
+        start = int(self.polygons._array("loop_start")[index])
+        total = int(self.polygons._array("loop_total")[index])
+        return list(self.loops._array("vertex_index")[start:start + total])
+
+    def from_pydata(self, vertices, edges, faces):
+        self.clear_geometry()
+        self.vertices.add(len(vertices))
+        if len(vertices):
+            self.vertices.foreach_set("co", np.asarray(vertices, dtype=np.float32).ravel())
+        loop_total = np.array([len(face) for face in faces], dtype=np.int32)
+        self.loops.add(int(loop_total.sum()))
+        self.loops.foreach_set("vertex_index", [v for face in faces for v in face])
+        self.polygons.add(len(faces))
+        self.polygons.foreach_set("loop_start", np.cumsum(loop_total) - loop_total)
+        self.polygons.foreach_set("loop_total", loop_total)
+        self.update(calc_edges=True)
+
+    def update(self, calc_edges=False, calc_edges_loose=False):
+        self._update_loop_total()
+        if calc_edges and len(self.polygons):
+            loop_verts = self.loops._array("vertex_index").astype(np.int64)
+            loop_start = self.polygons._array("loop_start").astype(np.int64)
+            loop_total = self.polygons._array("loop_total").astype(np.int64)
+            following = np.arange(len(loop_verts)) + 1
+            following[loop_start + loop_total - 1] = loop_start
+            low = np.minimum(loop_verts, loop_verts[following])
+            high = np.maximum(loop_verts, loop_verts[following])
+            loop_keys = low * len(self.vertices) + high
+            keys = np.unique(loop_keys)
+            edges = np.stack([keys // len(self.vertices), keys % len(self.vertices)], axis=1)
+            self.edges._resize(len(edges))
+            self.edges.foreach_set("vertices", edges.ravel())
+            self.loops.foreach_set("edge_index", np.searchsorted(keys, loop_keys).astype(np.int32))
+
+    def validate(self, verbose=False, clean_customdata=True):
+        return False
+
+
+##### curves, lights, cameras ##################################################
+class _BezierPoint:
+    def __init__(self):
+        self.co = mathutils.Vector((0, 0, 0))
+        self.handle_left = mathutils.Vector((0, 0, 0))
+        self.handle_right = mathutils.Vector((0, 0, 0))
+        self.handle_left_type = 'FREE'
+        self.handle_right_type = 'FREE'
+
+    def __setattr__(self, name, value):
+        if name in ("co", "handle_left", "handle_right"):
+            value = mathutils.Vector(value)
+        super().__setattr__(name, value)
+
+
+class _BezierPoints(list):
+    def add(self, count=1):
+        self.extend(_BezierPoint() for _ in range(count))
+
+
+class _Spline:
+    def __init__(self, spline_type):
+        self.type = spline_type
+        self.use_cyclic_u = False
+        self.bezier_points = _BezierPoints([_BezierPoint()])
+
+    def calc_length(self, resolution=0):
+        points = [point.co for point in self.bezier_points]
+        if self.use_cyclic_u:
+            points = points + points[:1]
+        return sum((b - a).length for a, b in zip(points, points[1:]))
+
+
+class _Splines(list):
+    def new(self, type):
+        spline = _Spline(type)
+        self.append(spline)
+        return spline
+
+
+class Curve(ID):
+    def __init__(self, name, type='CURVE'):
+        super().__init__(name)
+        self.type = type
+        self.dimensions = '2D'
+        self.splines = _Splines()
+
+
+class Light(ID):
+    def __init__(self, name, type='POINT'):
+        super().__init__(name)
+        self.type = type
+        self.energy = 10.0
+        self.color = (1.0, 1.0, 1.0)
+        self.size = 0.25 # area light size of bpy.data.lights.new
+
+
+class Camera(ID):
+    def __init__(self, name):
+        super().__init__(name)
+        self.lens = 50.0
+        self.clip_start = 0.1
+        self.clip_end = 1000.0
+
+
+class Material(ID):
+    pass
+
+
+class Image(ID):
+    pass
+
+
+##### objects #################################################################
+class _Modifier:
+    def __init__(self, name, type):
+        self.name = name
+        self.type = type
+
+
+class _Modifiers(_NamedList):
+    def new(self, name, type):
+        modifier = _Modifier(name, type)
+        self.append(modifier)
+        return modifier
+
+
+class _VertexGroup:
+    def __init__(self, name, index):
+        self.name = name
+        self.index = index
+
+
+class _VertexGroups(_NamedList):
+    def new(self, name="Group"):
+        group = _VertexGroup(name, len(self))
+        self.append(group)
+        return group
+
+
+class Object(ID):
+    _types = {Mesh: 'MESH', Curve: 'CURVE', Light: 'LIGHT', Camera: 'CAMERA'}
+
+    def __init__(self, name, object_data=None):
+        super().__init__(name)
+        self._data = None
+        self._collections = []
+        self._select = False
+        self.data = object_data
+        self.location = (0, 0, 0)
+        self.rotation_euler = (0, 0, 0)
+        self.scale = (1, 1, 1)
+        self.parent = None
+        self.matrix_parent_inverse = mathutils.Matrix.Identity(4)
+        self.lock_location = [False, False, False]
+        self.lock_rotation = [False, False, False]
+        self.lock_scale = [False, False, False]
+        self.hide_viewport = False
+        self.hide_render = False
+        self.instance_type = 'NONE'
+        self.instance_collection = None
+        self.modifiers = _Modifiers()
+        self.vertex_groups = _VertexGroups()
+
+    def __setattr__(self, name, value):
+        if name in ("location", "scale"):
+            value = mathutils.Vector(value)
+        elif name == "rotation_euler":
+            value = mathutils.Euler(value)
+        elif name == "matrix_parent_inverse":
+            value = mathutils.Matrix(value)
+        super().__setattr__(name, value)
+
+    @property
+    def data(self):
+        return self._data
+
+    @data.setter
+    def data(self, value):
+        if self._data is not None:
+            self._data._users -= 1
+        if value is not None:
+            value._users += 1
+        self._data = value
+
+    @property
+    def type(self):
+        return self._types.get(type(self._data), 'EMPTY')
+
+    @property
+    def matrix_basis(self):
+        rotation = self.rotation_euler.to_matrix().to_4x4()
+        return (mathutils.Matrix.Translation(self.location) @ rotation
+                @ mathutils.Matrix.Diagonal(list(self.scale) + [1.0]))
+
+    @property
+    def matrix_world(self):
+        if self.parent is None:
+            return self.matrix_basis
+        return self.parent.matrix_world @ self.matrix_parent_inverse @ self.matrix_basis
+
+    @property
+    def children(self):
+        return tuple(obj for obj in data.objects if obj.parent is self)
+
+    @property
+    def children_recursive(self):
+        children = list(self.children)
+        for child in list(children):
+            children += child.children_recursive
+        return children
+
+    @property
+    def users_collection(self):
+        return tuple(self._collections)
+
+    @property
+    def bound_box(self):
+        if self.type != 'MESH' or len(self._data.vertices) == 0:
+            return [(0.0, 0.0, 0.0)] * 8
+        co = self._data.vertices._array("co")
+        low, high = co.min(axis=0), co.max(axis=0)
+        return [tuple(float(v) for v in np.where(corner, high, low))
+                for corner in itertools.product((0, 1), repeat=3)]
+
+    @property
+    def dimensions(self):
+        corners = np.array(self.bound_box)
+        return mathutils.Vector((corners.max(axis=0) - corners.min(axis=0)) * np.array(list(self.scale)))
+
+    def select_set(self, state):
+        self._select = bool(state)
+
+    def select_get(self):
+        return self._select
+
+    def to_mesh(self, preserve_all_data_layers=False, depsgraph=None):
+        return self._data if self.type == 'MESH' else None
+
+    def to_mesh_clear(self):
+        pass
+
+
+##### collections and scenes ##################################################
+class _CollectionObjects:
+    """ keyed by identity, objects can be renamed while they are linked """
+    def __init__(self, collection):
+        self._collection = collection
+        self._objects = {}
+
+    def link(self, obj):
+        if id(obj) in self._objects:
+            raise RuntimeError("Object '%s' already in collection '%s'" % (obj.name, self._collection.name))
+        self._objects[id(obj)] = obj
+        obj._collections.append(self._collection)
+        obj._users += 1
+
+    def unlink(self, obj):
+        self._objects.pop(id(obj))
+        obj._collections.remove(self._collection)
+        obj._users -= 1
+
+    def get(self, name, default=None):
+        return next((obj for obj in self._objects.values() if obj.name == name), default)
+
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            return list(self._objects.values())[key]
+        obj = self.get(key)
+        if obj is None:
+            raise KeyError(key)
+        return obj
+
+    def __contains__(self, key):
+        if isinstance(key, str):
+            return self.get(key) is not None
+        return id(key) in self._objects
+
+    def __iter__(self):
+        return iter(list(self._objects.values()))
+
+    def __len__(self):
+        return len(self._objects)
+
+
+class _CollectionChildren(list):
+    def link(self, collection):
+        self.append(collection)
+        collection._users += 1
+
+    def unlink(self, collection):
+        self.remove(collection)
+        collection._users -= 1
+
+
+class Collection(ID):
+    def __init__(self, name):
+        super().__init__(name)
+        self.objects = _CollectionObjects(self)
+        self.children = _CollectionChildren()
+
+    @property
+    def all_objects(self):
+        objects = {}
+        for collection in [self] + self.children_recursive:
+            for obj in collection.objects:
+                objects[id(obj)] = obj
+        return list(objects.values())
+
+    @property
+    def children_recursive(self):
+        children = list(self.children)
+        for child in list(children):
+            children += child.children_recursive
+        return children
+
+
+class _SceneObjects:
+    def __init__(self, scene):
+        self._scene = scene
+
+    def _objects(self):
+        return self._scene.collection.all_objects
+
+    def get(self, name, default=None):
+        return next((obj for obj in self._objects() if obj.name == name), default)
+
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            return self._objects()[key]
+        obj = self.get(key)
+        if obj is None:
+            raise KeyError(key)
+        return obj
+
+    def __contains__(self, key):
+        name = key if isinstance(key, str) else key.name
+        return self.get(name) is not None
+
+    def __iter__(self):
+        return iter(self._objects())
+
+    def __len__(self):
+        return len(self._objects())
+
+
+class _LayerObjects(_SceneObjects):
+    def __init__(self, scene):
+        super().__init__(scene)
+        self.active = None
+
+    @property
+    def selected(self):
+        return [obj for obj in self._objects() if obj._select]
+
+
+class _ViewLayer:
+    def __init__(self, scene):
+        self.name = "ViewLayer"
+        self.objects = _LayerObjects(scene)
+
+    def update(self):
+        pass
+
+
+class _Settings:
+    def __init__(self, **values):
+        self.__dict__.update(values)
+
+
+class Scene(ID):
+    def __init__(self, name):
+        super().__init__(name)
+        self.collection = Collection("Scene Collection")
+        self.objects = _SceneObjects(self)
+        self.view_layers = [_ViewLayer(self)]
+        self.camera = None
+        self.frame_current = 1
+        self.render = _Settings(engine='BLENDER_EEVEE_NEXT', resolution_x=1920, resolution_y=1080,
+                                resolution_percentage=100, pixel_aspect_x=1.0, pixel_aspect_y=1.0,
+                                filepath="/tmp/", file_extension=".png",
+                                image_settings=_Settings(file_format='PNG'))
+
+
+##### depsgraph ###############################################################
+class _Depsgraph:
+    def __init__(self, scene):
+        self.scene = scene
+        self.updates = []
+
+    def update(self):
+        pass
+
+
+##### bpy.data ################################################################
+def _remove_ids(blocks):
+    blocks = [block for block in blocks if block is not None and not block._removed]
+    for block in blocks:
+        if isinstance(block, Object):
+            for collection in list(block._collections):
+                collection.objects.unlink(block)
+            block.data = None
+        block._removed = True
+        owner = block._owner
+        if owner is not None and owner._items.get(block._name) is block:
+            del owner._items[block._name]
+    removed = {id(block) for block in blocks if isinstance(block, Object)}
+    if removed:
+        for obj in data.objects:
+            if obj.parent is not None and id(obj.parent) in removed:
+                obj.parent = None
+    removed = {id(block) for block in blocks if isinstance(block, Collection)}
+    if removed:
+        for parent in list(data.collections) + [scene.collection for scene in data.scenes]:
+            parent.children[:] = [child for child in parent.children if id(child) not in removed]
+
+
+class _BlendData:
+    def __init__(self):
+        self.filepath = ""
+        self.objects = _IDCollection(Object)
+        self.meshes = _IDCollection(Mesh)
+        self.curves = _IDCollection(Curve)
+        self.lights = _IDCollection(Light)
+        self.cameras = _IDCollection(Camera)
+        self.materials = _IDCollection(Material)
+        self.images = _IDCollection(Image)
+        self.collections = _IDCollection(Collection)
+        self.scenes = _IDCollection(Scene)
+
+    def batch_remove(self, ids):
+        recorder.operators["data.batch_remove"] += 1
+        _remove_ids(list(ids))
+
+    def orphans_purge(self, do_local_ids=True, do_linked_ids=True, do_recursive=False):
+        orphans = [block for blocks in (self.meshes, self.curves, self.lights, self.cameras, self.materials)
+                   for block in blocks if block.users == 0]
+        _remove_ids(orphans)
+        return len(orphans)
+
+
+data = _BlendData()
+
+
+##### bpy.context #############################################################
+class _Context:
+    def __init__(self):
+        self.mode = 'OBJECT'
+        self.scene = None
+
+    @property
+    def view_layer(self):
+        return self.scene.view_layers[0]
+
+    @property
+    def window_manager(self):
+        return window_manager
+
+    @property
+    def collection(self):
+        return self.scene.collection
+
+    @property
+    def active_object(self):
+        return self.view_layer.objects.active
+
+    object = active_object
+
+    @property
+    def selected_objects(self):
+        return self.view_layer.objects.selected
+
+    def evaluated_depsgraph_get(self):
+        return _Depsgraph(self.scene)
+
+
+context = _Context()
+
+
+def _new_file(use_empty=True):
+    global data
+    data = _BlendData()
+    context.scene = data.scenes.new("Scene")
+    context.mode = 'OBJECT'
+    if not use_empty:
+        _add_primitive("Cube", *_box_geometry(2), location=(0, 0, 0))
+        context.scene.collection.objects.link(data.objects.new("Light", data.lights.new("Light")))
+        context.scene.camera = data.objects.new("Camera", data.cameras.new("Camera"))
+        context.scene.collection.objects.link(context.scene.camera)
+
+
+##### bpy.types ###############################################################
+class Operator(bpy_struct):
+    bl_idname = ""
+    bl_label = ""
+    bl_options = set()
+
+    def report(self, level, message):
+        pass
+
+
+class Panel(bpy_struct):
+    pass
+
+
+class WindowManager(bpy_struct):
+    def fileselect_add(self, operator):
+        pass
+
+
+window_manager = WindowManager()
+
+
+class _Types:
+    bpy_struct = bpy_struct
+    ID = ID
+    Object = Object
+    Mesh = Mesh
+    Curve = Curve
+    Light = Light
+    Camera = Camera
+    Material = Material
+    Image = Image
+    Collection = Collection
+    Scene = Scene
+    Operator = Operator
+    Panel = Panel
+    PropertyGroup = PropertyGroup
+    WindowManager = WindowManager
+
+
+types = _Types()
+
+
+##### bpy.utils ###############################################################
+_operators = {}
+
+
+class _Utils:
+    @staticmethod
+    def register_class(cls):
+        for name, value in getattr(cls, "__annotations__", {}).items():
+            if isinstance(value, _Property):
+                setattr(cls, name, value)
+        if issubclass(cls, Operator):
+            _operators[cls.bl_idname] = cls
+
+    @staticmethod
+    def unregister_class(cls):
+        if issubclass(cls, Operator):
+            _operators.pop(cls.bl_idname, None)
+
+
+utils = _Utils()
+
+
+##### bpy.app #################################################################
+class _Handlers:
+    def __init__(self):
+        self.frame_change_pre = []
+        self.frame_change_post = []
+        self.depsgraph_update_pre = []
+        self.depsgraph_update_post = []
+        self.load_post = []
+        self.render_pre = []
+        self.render_post = []
+
+    @staticmethod
+    def persistent(function):
+        return function
+
+
+class _Timers:
+    def __init__(self):
+        self._timers = {}
+
+    def register(self, function, first_interval=0, persistent=False):
+        self._timers[function] = first_interval
+
+    def unregister(self, function):
+        del self._timers[function]
+
+    def is_registered(self, function):
+        return function in self._timers
+
+
+class _App:
+    version = (4, 2, 0)
+    version_string = "4.2.0 (fake)"
+    background = True
+
+    def __init__(self):
+        self.handlers = _Handlers()
+        self.timers = _Timers()
+
+
+app = _App()
+
+
+##### bpy.ops #################################################################
+def _box_geometry(size):
+    half = size / 2
+    verts = [(x, y, z) for x in (-half, half) for y in (-half, half) for z in (-half, half)]
+    faces = [(0, 1, 3, 2), (4, 6, 7, 5), (0, 4, 5, 1), (2, 3, 7, 6), (0, 2, 6, 4), (1, 5, 7, 3)]
+    return verts, faces
+
+
+def _grid_geometry(x_subdivisions, y_subdivisions, size):
+    xs = np.linspace(-size / 2, size / 2, x_subdivisions + 1)
+    ys = np.linspace(-size / 2, size / 2, y_subdivisions + 1)
+    gx, gy = np.meshgrid(xs, ys, indexing='ij')
+    verts = np.stack([gx.ravel(), gy.ravel(), np.zeros(gx.size)], axis=1)
+    corner = (np.arange(x_subdivisions)[:, None] * (y_subdivisions + 1) + np.arange(y_subdivisions)[None, :]).ravel()
+    faces = np.stack([corner, corner + y_subdivisions + 1, corner + y_subdivisions + 2, corner + 1], axis=1)
+    return verts, faces
+
+
+def _sphere_geometry(segments, ring_count, radius):
+    theta = np.linspace(0, math.pi, ring_count + 1)[1:-1]
+    phi = np.linspace(0, 2 * math.pi, segments, endpoint=False)
+    t, p = np.meshgrid(theta, phi, indexing='ij')
+    verts = np.stack([np.sin(t) * np.cos(p), np.sin(t) * np.sin(p), np.cos(t)], axis=-1).reshape(-1, 3)
+    verts = np.concatenate([verts, [(0, 0, 1), (0, 0, -1)]]) * radius
+    ring = lambda r, s: r * segments + s % segments
+    faces = [(ring(r, s), ring(r, s + 1), ring(r + 1, s + 1), ring(r + 1, s))
+             for r in range(ring_count - 2) for s in range(segments)]
+    top, bottom = len(verts) - 2, len(verts) - 1
+    faces += [(top, ring(0, s + 1), ring(0, s)) for s in range(segments)]
+    faces += [(bottom, ring(ring_count - 2, s), ring(ring_count - 2, s + 1)) for s in range(segments)]
+    return verts, faces
+
+
+def _add_primitive(name, verts, faces, location=(0, 0, 0), **options):
+    mesh = data.meshes.new(name)
+    mesh.from_pydata(np.asarray(verts, dtype=np.float64), [], [list(face) for face in faces])
+    obj = data.objects.new(name, mesh)
+    obj.location = location
+    context.collection.objects.link(obj)
+    for selected in context.selected_objects:
+        selected._select = False
+    obj._select = True
+    context.view_layer.objects.active = obj
+    return {'FINISHED'}
+
+
+def _mode_set(mode='OBJECT', toggle=False):
+    context.mode = 'OBJECT' if mode == 'OBJECT' else 'EDIT_MESH'
+    return {'FINISHED'}
+
+
+def _select_all(action='TOGGLE'):
+    objects = list(context.view_layer.objects)
+    state = action == 'SELECT' or (action == 'TOGGLE' and not any(obj._select for obj in objects))
+    for obj in objects:
+        obj._select = (not obj._select) if action == 'INVERT' else state
+    return {'FINISHED'}
+
+
+def _delete(use_global=False, confirm=True):
+    _remove_ids(context.selected_objects)
+    return {'FINISHED'}
+
+
+_BUILTIN_OPERATORS = {
+    "wm.read_factory_settings": lambda use_empty=False, **options: _new_file(use_empty) or {'FINISHED'},
+    "wm.read_homefile": lambda use_empty=False, **options: _new_file(use_empty) or {'FINISHED'},
+    "mesh.primitive_plane_add": lambda size=2, location=(0, 0, 0), **options:
+        _add_primitive("Plane", *_grid_geometry(1, 1, size), location=location),
+    "mesh.primitive_grid_add": lambda x_subdivisions=10, y_subdivisions=10, size=2, location=(0, 0, 0), **options:
+        _add_primitive("Grid", *_grid_geometry(x_subdivisions, y_subdivisions, size), location=location),
+    "mesh.primitive_cube_add": lambda size=2, location=(0, 0, 0), **options:
+        _add_primitive("Cube", *_box_geometry(size), location=location),
+    "mesh.primitive_uv_sphere_add": lambda segments=32, ring_count=16, radius=1, location=(0, 0, 0), **options:
+        _add_primitive("Sphere", *_sphere_geometry(segments, ring_count, radius), location=location),
+    "object.mode_set": _mode_set,
+    "object.editmode_toggle": lambda **options: _mode_set('OBJECT' if context.mode != 'OBJECT' else 'EDIT'),
+    "object.select_all": _select_all,
+    "object.delete": _delete,
+}
+
+
+def _call_operator(idname, *args, **options):
+    recorder.operators[idname] += 1
+    if idname in _operators:
+        operator = _operators[idname]()
+        for name, value in options.items():
+            setattr(operator, name, value)
+        return operator.execute(context)
+    if idname in _BUILTIN_OPERATORS:
+        return _BUILTIN_OPERATORS[idname](**options)
+    return {'FINISHED'}
+
+
+class _OperatorCall:
+    def __init__(self, idname):
+        self._idname = idname
+
+    def idname_py(self):
+        return self._idname
+
+    def __call__(self, *args, **options):
+        return _call_operator(self._idname, *args, **options)
+
+
+class _OperatorModule:
+    def __init__(self, module):
+        self._module = module
+
+    def __getattr__(self, name):
+        return _OperatorCall("%s.%s" % (self._module, name))
+
+
+class _Ops:
+    def __getattr__(self, module):
+        return _OperatorModule(module)
+
+
+ops = _Ops()
+
+_new_file()
@@ -0,0 +1,188 @@
+###############################################
+###### mathutils stand-in #####################
+###### author : Efe Ulgen #####################
+###############################################
+##### The Vector, Euler and Matrix parts of mathutils the scripts use, on
+##### plain Python and NumPy. Only for the fake benchmark backend.
+###############################################
+
+import math
+
+import numpy as np
+
+
+class Vector:
+    def __init__(self, values=(0, 0, 0)):
+        self._values = [float(v) for v in values]
+
+    def __len__(self):
+        return len(self._values)
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return tuple(self._values[index])
+        return self._values[index]
+
+    def __setitem__(self, index, value):
+        self._values[index] = float(value)
+
+    def __array__(self, dtype=None, copy=None):
+        return np.array(self._values, dtype=dtype)
+
+    def __repr__(self):
+        return "Vector((%s))" % ", ".join("%.4f" % v for v in self._values)
+
+    def __eq__(self, other):
+        try:
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        except TypeError:
+            return NotImplemented
+
+    __hash__ = None
+
+    def _component(index):
+        return property(lambda self: self._values[index],
+                        lambda self, value: self.__setitem__(index, value))
+
+    x = _component(0)
+    y = _component(1)
+    z = _component(2)
+    w = _component(3)
+    del _component
+
+    def __add__(self, other):
+        return Vector(a + b for a, b in zip(self, other))
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        return Vector(a - b for a, b in zip(self, other))
+
+    def __rsub__(self, other):
+        return Vector(b - a for a, b in zip(self, other))
+
+    def __mul__(self, other):
+        if isinstance(other, (int, float)):
+            return Vector(a * other for a in self)
+        return Vector(a * b for a, b in zip(self, other))
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        return Vector(a / other for a in self)
+
+    def __neg__(self):
+        return Vector(-a for a in self)
+
+    def __matmul__(self, other):
+        if isinstance(other, Vector):
+            return self.dot(other)
+        return NotImplemented
+
+    def copy(self):
+        return Vector(self._values)
+
+    def to_tuple(self, precision=-1):
+        return tuple(self._values if precision < 0 else (round(v, precision) for v in self._values))
+
+    def dot(self, other):
+        return sum(a * b for a, b in zip(self, other))
+
+    def cross(self, other):
+        ax, ay, az = self
+        bx, by, bz = other
+        return Vector((ay * bz - az * by, az * bx - ax * bz, ax * by - ay * bx))
+
+    @property
+    def length(self):
+        return math.sqrt(self.dot(self))
+
+    def normalized(self):
+        length = self.length
+        return self.copy() if length == 0 else self / length
+
+
+class Euler(Vector):
+    def __init__(self, angles=(0, 0, 0), order='XYZ'):
+        super().__init__(angles)
+        self.order = order
+
+    def __repr__(self):
+        return "Euler((%s))" % ", ".join("%.4f" % v for v in self._values)
+
+    def copy(self):
+        return Euler(self._values, self.order)
+
+    def to_matrix(self):
+        x, y, z = self._values
+        rx = np.array([[1, 0, 0], [0, math.cos(x), -math.sin(x)], [0, math.sin(x), math.cos(x)]])
+        ry = np.array([[math.cos(y), 0, math.sin(y)], [0, 1, 0], [-math.sin(y), 0, math.cos(y)]])
+        rz = np.array([[math.cos(z), -math.sin(z), 0], [math.sin(z), math.cos(z), 0], [0, 0, 1]])
+        return Matrix(rz @ ry @ rx)
+
+
+class Matrix:
+    def __init__(self, rows=None):
+        self._m = np.identity(4) if rows is None else np.array([list(row) for row in rows], dtype=np.float64)
+
+    @classmethod
+    def Identity(cls, size):
+        return cls(np.identity(size))
+
+    @classmethod
+    def Translation(cls, vector):
+        matrix = np.identity(4)
+        matrix[:3, 3] = list(vector)[:3]
+        return cls(matrix)
+
+    @classmethod
+    def Diagonal(cls, vector):
+        return cls(np.diag(list(vector)))
+
+    def __len__(self):
+        return len(self._m)
+
+    def __iter__(self):
+        return (Vector(row) for row in self._m)
+
+    def __getitem__(self, index):
+        return Vector(self._m[index])
+
+    def __array__(self, dtype=None, copy=None):
+        return np.array(self._m, dtype=dtype)
+
+    def __repr__(self):
+        return "Matrix(%s)" % self._m.tolist()
+
+    def __matmul__(self, other):
+        if isinstance(other, Matrix):
+            return Matrix(self._m @ other._m)
+        values = np.array(list(other), dtype=np.float64)
+        if len(values) == 3 and len(self._m) == 4:
+            return Vector((self._m @ np.append(values, 1.0))[:3])
+        return Vector(self._m @ values)
+
+    def copy(self):
+        return Matrix(self._m)
+
+    def inverted(self):
+        return Matrix(np.linalg.inv(self._m))
+
+    def to_3x3(self):
+        return Matrix(self._m[:3, :3])
+
+    def to_4x4(self):
+        matrix = np.identity(4)
+        matrix[:len(self._m), :len(self._m)] = self._m
+        return Matrix(matrix)
+
+    @property
+    def translation(self):
+        return Vector(self._m[:3, 3])
+
+    @translation.setter
+    def translation(self, vector):
+        self._m[:3, 3] = list(vector)[:3]
@@ -0,0 +1,250 @@
+###############################################
+###### Benchmark Harness ######################
+###### author : Efe Ulgen #####################
+###############################################
+##### Times CityGenerator.py, MakeSpikePattern.py and RenderSetupGenerator.py
+##### over parameter sweeps and writes the results as JSON. Two backends :
+#####     fake    : the recording bpy / bmesh / mathutils stand-in in fake_bpy/,
+#####               runs with plain Python and NumPy, for CI
+#####     blender : the real bpy, in headless Blender or from the bpy module
+#####     python benchmarks/run_benchmarks.py --backend fake --output fake.json
+#####     blender --background --python benchmarks/run_benchmarks.py -- --backend blender --output blender.json
+##### Compare two result files, exits with 1 when a case got slower than
+##### --threshold :
+#####     python benchmarks/run_benchmarks.py --compare base.json head.json
+###############################################
+
+import argparse
+import contextlib
+import datetime
+import importlib.util
+import io
+import json
+import math
+import os
+import platform
+import re
+import subprocess
+import sys
+import time
+
+benchmarks_dir = os.path.dirname(os.path.abspath(__file__))
+script_dir = os.path.join(benchmarks_dir, "..")
+fake_bpy_dir = os.path.join(benchmarks_dir, "fake_bpy")
+
+CASES = ("city", "spike", "bounds", "render_setup_generate", "render_setup_clear")
+bpy = None
+_modules = {}
+
+
+def load_backend(backend):
+    global bpy
+    in_blender = "bpy" in sys.modules
+    if backend == 'auto':
+        backend = 'blender' if in_blender or importlib.util.find_spec("bpy") else 'fake'
+    if backend == 'fake':
+        if in_blender:
+            raise RuntimeError("The fake backend can not run inside Blender")
+        sys.path.insert(0, fake_bpy_dir)
+    import bpy as loaded_bpy
+    bpy = loaded_bpy
+    return backend
+
+
+def load_module(name):
+    """ Imports one of the repo scripts as a module, once """
+    if name not in _modules:
+        spec = importlib.util.spec_from_file_location(name, os.path.join(script_dir, name + ".py"))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        module.register()
+        _modules[name] = module
+    return _modules[name]
+
+
+def script_runner(name, overrides):
+    """ Runs a repo script like Blender's text editor does, with its module level
+    parameters replaced by overrides """
+    path = os.path.join(script_dir, name + ".py")
+    with open(path) as script:
+        source = script.read()
+    for parameter, value in overrides.items():
+        source, count = re.subn(r"^%s = .*$" % parameter, "%s = %r" % (parameter, value), source, count=1, flags=re.M)
+        if count == 0:
+            raise ValueError("%s has no module level parameter %s" % (name, parameter))
+    code = compile(source, path, 'exec')
+    return lambda: exec(code, {"__name__": "__main__", "__file__": path})
+
+
+def new_scene():
+    bpy.ops.wm.read_factory_settings(use_empty=True)
+    return bpy.context.scene
+
+
+def add_grid(face_count):
+    side = max(1, int(round(math.sqrt(face_count))))
+    bpy.ops.mesh.primitive_grid_add(x_subdivisions=side, y_subdivisions=side, size=2)
+    return bpy.context.active_object
+
+
+##### cases : set the scene up, return what is timed ##########################
+def city_case(city_size, generation_mode):
+    new_scene()
+    return script_runner("CityGenerator", {"city_size": city_size, "generation_mode": generation_mode})
+
+
+def spike_case(face_count):
+    new_scene()
+    add_grid(face_count)
+    return script_runner("MakeSpikePattern", {})
+
+
+def bounds_case(vertex_count):
+    render_setup = load_module("RenderSetupGenerator")
+    new_scene()
+    subject = add_grid(vertex_count)
+    return lambda: render_setup.get_world_bounds([subject])
+
+
+def fill_scene(scene_objects):
+    scene = new_scene()
+    for n in range(scene_objects):
+        scene.collection.objects.link(bpy.data.objects.new("Filler_%d" % n, None))
+    bpy.ops.mesh.primitive_cube_add()
+
+
+def render_setup_generate_case(scene_objects):
+    load_module("RenderSetupGenerator")
+    fill_scene(scene_objects)
+    return bpy.ops.mesh.generate_render_setup
+
+
+def render_setup_clear_case(scene_objects):
+    load_module("RenderSetupGenerator")
+    fill_scene(scene_objects)
+    bpy.ops.mesh.generate_render_setup()
+    return bpy.ops.mesh.clear_render_setup
+
+
+def sweeps(args):
+    """ (case, case function, params) of every run """
+    for case in args.cases:
+        if case == "city":
+            for generation_mode in args.city_modes:
+                for city_size in args.city_sizes:
+                    yield case, city_case, {"city_size": city_size, "generation_mode": generation_mode}
+        elif case == "spike":
+            for face_count in args.face_counts:
+                yield case, spike_case, {"face_count": face_count}
+        elif case == "bounds":
+            for vertex_count in args.vertex_counts:
+                yield case, bounds_case, {"vertex_count": vertex_count}
+        else:
+            function = render_setup_generate_case if case == "render_setup_generate" else render_setup_clear_case
+            for scene_objects in args.scene_objects:
+                yield case, function, {"scene_objects": scene_objects}
+
+
+##### one case, best of repeat runs on a fresh scene each #####################
+def run_case(case_function, params, repeat):
+    seconds = []
+    for _ in range(repeat):
+        run = case_function(**params)
+        objects, meshes = len(bpy.data.objects), len(bpy.data.meshes)
+        recorder = getattr(bpy, "recorder", None)
+        if recorder is not None:
+            recorder.reset()
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            run()
+            seconds.append(time.perf_counter() - start)
+    return {
+        "seconds": min(seconds),
+        "runs": seconds,
+        "objects_delta": len(bpy.data.objects) - objects,
+        "meshes_delta": len(bpy.data.meshes) - meshes,
+        "faces": sum(len(mesh.polygons) for mesh in bpy.data.meshes),
+        "recorded": recorder.snapshot() if recorder is not None else None,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=script_dir, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(args):
+    backend = load_backend(args.backend)
+    report = {
+        "backend": backend,
+        "blender_version": ".".join(str(v) for v in bpy.app.version),
+        "python_version": platform.python_version(),
+        "commit": git_commit(),
+        "date": datetime.datetime.now().isoformat(timespec='seconds'),
+        "results": [],
+    }
+    print("%-22s %-50s %10s" % ("case", "params", "seconds"))
+    for case, case_function, params in sweeps(args):
+        result = run_case(case_function, params, args.repeat)
+        report["results"].append(dict(case=case, params=params, **result))
+        print("%-22s %-50s %10.4f" % (case, json.dumps(params, sort_keys=True), result["seconds"]))
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(report, output, indent=1)
+    return report
+
+
+##### compare mode ############################################################
+def compare(base_path, head_path, threshold):
+    with open(base_path) as base_file, open(head_path) as head_file:
+        base, head = json.load(base_file), json.load(head_file)
+    if base["backend"] != head["backend"]:
+        print("Warning : comparing %s results with %s results" % (base["backend"], head["backend"]))
+    key = lambda result: (result["case"], json.dumps(result["params"], sort_keys=True))
+    base_results = {key(result): result for result in base["results"]}
+    regressions = 0
+    print("%-22s %-50s %10s %10s %8s" % ("case", "params", "base s", "head s", "ratio"))
+    for result in head["results"]:
+        base_result = base_results.get(key(result))
+        if base_result is None:
+            print("%-22s %-50s %10s %10.4f %8s" % (key(result) + ("-", result["seconds"], "new")))
+            continue
+        ratio = result["seconds"] / base_result["seconds"] if base_result["seconds"] else float("inf")
+        slower = ratio > 1 + threshold
+        regressions += slower
+        print("%-22s %-50s %10.4f %10.4f %8.2f%s" % (key(result) + (base_result["seconds"], result["seconds"], ratio,
+                                                                    "  SLOWER" if slower else "")))
+    print("%d of %d cases slower by more than %d%%" % (regressions, len(head["results"]), threshold * 100))
+    return regressions
+
+
+def main():
+    if "--" in sys.argv:
+        argv = sys.argv[sys.argv.index("--") + 1:]
+    else:
+        argv = [] if "bpy" in sys.modules else sys.argv[1:] # inside Blender the rest are Blender's arguments
+    parser = argparse.ArgumentParser(description="Benchmarks of the Blender scripts of this repo")
+    parser.add_argument("--backend", choices=("auto", "fake", "blender"), default="auto")
+    parser.add_argument("--cases", nargs="+", choices=CASES, default=list(CASES))
+    parser.add_argument("--city-sizes", type=int, nargs="+", default=[10, 20, 40])
+    parser.add_argument("--city-modes", nargs="+", default=["BATCHED", "INSTANCED", "TILED"],
+                        choices=("BATCHED", "INSTANCED", "TILED", "PARALLEL", "OPERATORS"))
+    parser.add_argument("--face-counts", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--vertex-counts", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--scene-objects", type=int, nargs="+", default=[0, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="JSON file for the results")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "HEAD"), help="compare two JSON result files")
+    parser.add_argument("--threshold", type=float, default=0.2, help="slowdown reported by --compare, 0.2 is 20%%")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        sys.exit(1 if compare(*args.compare, args.threshold) else 0)
+    run_benchmarks(args)
+
+
+if __name__ == "__main__":
+    main()
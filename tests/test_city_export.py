@@ -0,0 +1,91 @@
+###############################################
+###### CityExport checks ######################
+###### author : Efe Ulgen #####################
+###############################################
+##### Reads the written files back and checks them against CityLayout.
+##### Runs without Blender :
+#####     python -m pytest tests
+###############################################
+
+import json
+import os
+import struct
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import CityExport
+import CityLayout
+
+LAYOUT_PARAMS = {"city_size": 9, "seed": 3}
+
+
+def read_glb(filepath):
+    with open(filepath, "rb") as f:
+        data = f.read()
+    magic, version, length = struct.unpack_from("<III", data, 0)
+    assert (magic, version, length) == (0x46546C67, 2, len(data))
+    json_length, _ = struct.unpack_from("<II", data, 12)
+    gltf = json.loads(data[20:20 + json_length])
+    bin_length, _ = struct.unpack_from("<II", data, 20 + json_length)
+    binary = data[28 + json_length:]
+    assert bin_length == len(binary) == gltf["buffers"][0]["byteLength"]
+    return gltf, binary
+
+
+def read_accessor(gltf, binary, index):
+    accessor = gltf["accessors"][index]
+    view = gltf["bufferViews"][accessor["bufferView"]]
+    dtype = "<f4" if accessor["componentType"] == 5126 else "<u4"
+    values = np.frombuffer(binary, dtype, count=view["byteLength"] // 4, offset=view["byteOffset"])
+    return values.reshape(accessor["count"], -1)
+
+
+@pytest.mark.parametrize("y_up", [True, False])
+def test_glb_accessor_bounds(tmp_path, y_up):
+    filepath = str(tmp_path / "city.glb")
+    CityExport.export_glb(filepath, tile_size=4, y_up=y_up, **LAYOUT_PARAMS)
+    gltf, binary = read_glb(filepath)
+    assert len(gltf["nodes"]) == 9
+    for mesh in gltf["meshes"]:
+        primitive = mesh["primitives"][0]
+        accessor = gltf["accessors"][primitive["attributes"]["POSITION"]]
+        positions = read_accessor(gltf, binary, primitive["attributes"]["POSITION"])
+        np.testing.assert_array_equal(positions.min(axis=0), np.float32(accessor["min"]))
+        np.testing.assert_array_equal(positions.max(axis=0), np.float32(accessor["max"]))
+        indices = read_accessor(gltf, binary, primitive["indices"])
+        assert indices.max() < len(positions)
+
+
+def test_glb_matches_layout(tmp_path):
+    filepath = str(tmp_path / "city.glb")
+    CityExport.export_glb(filepath, tile_size=4, y_up=False, **LAYOUT_PARAMS)
+    gltf, binary = read_glb(filepath)
+    for mesh, (tile, bounds, lods) in zip(gltf["meshes"], CityLayout.iter_tile_geometry(4, **LAYOUT_PARAMS)):
+        verts, faces, face_building_ids = lods[0]
+        primitive = mesh["primitives"][0]
+        assert mesh["name"] == "City_Tile_%d_%d" % tile
+        np.testing.assert_array_equal(read_accessor(gltf, binary, primitive["attributes"]["POSITION"]), verts)
+        building_ids = read_accessor(gltf, binary, primitive["attributes"]["_BUILDING_ID"]).ravel()
+        np.testing.assert_array_equal(building_ids[faces[:, 0]], face_building_ids)
+
+
+def test_obj_matches_layout(tmp_path):
+    filepath = str(tmp_path / "city.obj")
+    CityExport.export_obj(filepath, tile_size=4, y_up=False, **LAYOUT_PARAMS)
+    verts, faces, face_building_ids = CityLayout.build_geometry(CityLayout.generate_layout(**LAYOUT_PARAMS))
+    with open(filepath) as f:
+        lines = f.read().splitlines()
+    obj_verts = np.array([line.split()[1:] for line in lines if line.startswith("v ")], dtype=np.float64)
+    obj_faces = np.array([line.split()[1:] for line in lines if line.startswith("f ")], dtype=np.int64) - 1
+    assert sum(line.startswith("o ") for line in lines) == 9
+    assert len(obj_verts) == len(verts) and len(obj_faces) == len(faces)
+    ##### tiles reorder the buildings, compare the face corners building by building #####
+    tile_building_ids = np.concatenate([lods[0][2] for tile, bounds, lods
+                                        in CityLayout.iter_tile_geometry(4, **LAYOUT_PARAMS)])
+    order = np.argsort(face_building_ids, kind="stable")
+    obj_order = np.argsort(tile_building_ids, kind="stable")
+    np.testing.assert_allclose(obj_verts[obj_faces[obj_order]], verts[faces[order]], atol=1e-5)
@@ -0,0 +1,66 @@
+###############################################
+###### CityLayout checks ######################
+###### author : Efe Ulgen #####################
+###############################################
+##### Runs without Blender :
+#####     python -m pytest tests
+###############################################
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import CityLayout
+
+LAYOUT_PARAMS = {"city_size": 12, "seed": 7}
+
+
+def test_same_seed_same_city():
+    first = CityLayout.build_geometry(CityLayout.generate_layout(**LAYOUT_PARAMS))
+    second = CityLayout.build_geometry(CityLayout.generate_layout(**LAYOUT_PARAMS))
+    for a, b in zip(first, second):
+        np.testing.assert_array_equal(a, b)
+
+
+def test_other_seed_other_city():
+    first = CityLayout.generate_layout(**LAYOUT_PARAMS)
+    second = CityLayout.generate_layout(**dict(LAYOUT_PARAMS, seed=8))
+    assert not np.array_equal(first["height"], second["height"])
+
+
+def test_block_matches_whole_city():
+    city = CityLayout.generate_layout(**LAYOUT_PARAMS)
+    block = CityLayout.generate_layout(row_range=(3, 8), col_range=(5, 12), **LAYOUT_PARAMS)
+    city_size = LAYOUT_PARAMS["city_size"]
+    rows, cols = np.divmod(city["building_id"] - 1, city_size)
+    inside = (rows >= 3) & (rows < 8) & (cols >= 5) & (cols < 12)
+    for key, values in block.items():
+        np.testing.assert_array_equal(values, city[key][inside], err_msg=key)
+
+
+def test_tiles_match_whole_city():
+    verts, faces, face_building_ids = CityLayout.build_geometry(CityLayout.generate_layout(**LAYOUT_PARAMS))
+    for tile, bounds, lods in CityLayout.iter_tile_geometry(5, **LAYOUT_PARAMS):
+        tile_verts, tile_faces, tile_building_ids = lods[0]
+        inside = np.isin(face_building_ids, tile_building_ids)
+        np.testing.assert_array_equal(tile_building_ids, face_building_ids[inside])
+        np.testing.assert_array_equal(tile_verts[tile_faces], verts[faces[inside]])
+
+
+def test_geometry_counts_match_geometry():
+    layout = CityLayout.generate_layout(**LAYOUT_PARAMS)
+    verts, faces, face_building_ids = CityLayout.build_geometry(layout)
+    vert_count, face_count = CityLayout.geometry_counts(layout)
+    assert len(verts) == vert_count.sum()
+    assert len(faces) == face_count.sum()
+
+
+def test_layout_bounds_hold_geometry():
+    layout = CityLayout.generate_layout(**LAYOUT_PARAMS)
+    verts, faces, face_building_ids = CityLayout.build_geometry(layout)
+    bounds_min, bounds_max = CityLayout.layout_bounds(layout)
+    np.testing.assert_allclose(verts.min(axis=0), bounds_min, atol=1e-5)
+    np.testing.assert_allclose(verts.max(axis=0), bounds_max, atol=1e-5)
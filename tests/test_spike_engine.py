@@ -0,0 +1,55 @@
+###############################################
+###### SpikeEngine checks #####################
+###### author : Efe Ulgen #####################
+###############################################
+##### Runs without Blender :
+#####     python -m pytest tests
+###############################################
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import SpikeEngine
+
+##### two unit quads side by side, facing +Z #####
+CO = np.array([(0, 0, 0), (1, 0, 0), (1, 1, 0), (0, 1, 0), (2, 0, 0), (2, 1, 0)], dtype=np.float64)
+LOOP_START = np.array([0, 4])
+LOOP_TOTAL = np.array([4, 4])
+LOOP_VERTS = np.array([0, 1, 2, 3, 1, 4, 5, 2])
+
+
+def test_pointed_spikes():
+    co, loop_verts, loop_total, polygon_faces, loop_sources, loop_weights = SpikeEngine.make_spikes(
+        CO, LOOP_START, LOOP_TOTAL, LOOP_VERTS, height=0.5)
+    np.testing.assert_allclose(co[len(CO):], [(0.5, 0.5, 0.5), (1.5, 0.5, 0.5)])
+    np.testing.assert_array_equal(loop_total, [3] * 8)
+    np.testing.assert_array_equal(polygon_faces, [0, 0, 0, 0, 1, 1, 1, 1])
+    ##### every triangle ends on the apex of its face #####
+    np.testing.assert_array_equal(loop_verts.reshape(-1, 3)[:, 2], [6] * 4 + [7] * 4)
+    assert len(loop_sources) == len(loop_weights) == len(loop_verts)
+
+
+def test_disabled_faces_are_kept():
+    co, loop_verts, loop_total, polygon_faces, loop_sources, loop_weights = SpikeEngine.make_spikes(
+        CO, LOOP_START, LOOP_TOTAL, LOOP_VERTS, height=0.5, enabled=[True, False])
+    assert len(co) == len(CO) + 1
+    np.testing.assert_array_equal(loop_total, [3, 3, 3, 3, 4])
+    np.testing.assert_array_equal(loop_verts[-4:], LOOP_VERTS[4:])
+    np.testing.assert_array_equal(loop_weights[-4:], 1.0)
+
+
+def test_truncated_tip():
+    co, loop_verts, loop_total, polygon_faces, loop_sources, loop_weights = SpikeEngine.make_spikes(
+        CO[:4], LOOP_START[:1], LOOP_TOTAL[:1], LOOP_VERTS[:4], height=1.0, sharpness=0.5)
+    np.testing.assert_allclose(co[4:], [(0.25, 0.25, 1), (0.75, 0.25, 1), (0.75, 0.75, 1), (0.25, 0.75, 1)])
+    np.testing.assert_array_equal(loop_total, [4, 4, 4, 4, 4])
+
+
+def test_value_noise_is_seeded():
+    points = np.random.default_rng(0).random((100, 3)) * 10
+    np.testing.assert_array_equal(SpikeEngine.value_noise(points, seed=3), SpikeEngine.value_noise(points, seed=3))
+    assert not np.array_equal(SpikeEngine.value_noise(points, seed=3), SpikeEngine.value_noise(points, seed=4))